@@ -0,0 +1,89 @@
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import pipeline  # noqa: E402
+from gerar_catalogo import gerar_csv  # noqa: E402
+from telemetria import Telemetria  # noqa: E402
+
+# Benchmark do processo de importação: gera catálogos sintéticos de vários tamanhos e mede
+# cada etapa (leitura, limpeza, resolução de margem e inserções em um SQLite descartável).
+
+TAMANHOS_PADRAO = [10000, 100000]
+
+# Função para criar as tabelas de destino em um banco SQLite vazio
+def criar_banco_sqlite(caminho):
+    conn = sqlite3.connect(caminho)
+    for tabela, estrutura in pipeline.ESTRUTURA_TABELAS.items():
+        definicao = ", ".join(f"{nome} {tipo}" for nome, tipo in estrutura)
+        conn.execute(f"CREATE TABLE {tabela} ({definicao})")
+    conn.execute(f"CREATE UNIQUE INDEX ix_Produtos_ID_Prod ON Produtos ({pipeline.CHAVE_UPSERT})")
+    conn.commit()
+    return conn
+
+# Função para executar uma rodada do benchmark e retornar o registro de métricas
+def executar_rodada(arquivo_csv, linhas, pasta, args):
+    caminho_banco = os.path.join(pasta, f"bench_{linhas}.db")
+    if os.path.exists(caminho_banco):
+        os.remove(caminho_banco)
+    conn = criar_banco_sqlite(caminho_banco)
+    telemetria = Telemetria()
+    try:
+        if args.tamanho_bloco:
+            resultado = pipeline.importar_csv_em_blocos(
+                arquivo_csv, args.mapeamento, conn, tamanho_lote=args.tamanho_lote,
+                tamanho_bloco=args.tamanho_bloco, telemetria=telemetria, modo=args.modo
+            )
+        else:
+            resultado = pipeline.importar_csv(
+                arquivo_csv, args.mapeamento, conn, tamanho_lote=args.tamanho_lote, telemetria=telemetria, modo=args.modo
+            )
+    finally:
+        conn.close()
+    return {"linhas_arquivo": linhas, "resultado": resultado, "metricas": telemetria.registro()}
+
+# Função para exibir o resumo de uma rodada em formato de tabela
+def imprimir_rodada(registro):
+    metricas = registro["metricas"]
+    print(f"\n== {registro['linhas_arquivo']} linhas | total {metricas['duracao_segundos']:.3f}s | pico de memória {metricas['pico_memoria_mb']} MB")
+    print(f"{'etapa':<30}{'segundos':>12}{'linhas':>12}{'linhas/s':>14}")
+    for etapa, info in metricas["etapas"].items():
+        print(f"{etapa:<30}{info['segundos']:>12.4f}{info['linhas']:>12}{info['linhas_por_segundo'] or 0:>14.0f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do processo de importação com catálogos sintéticos.")
+    parser.add_argument("--linhas", type=int, nargs="+", default=TAMANHOS_PADRAO, help="Tamanhos dos catálogos (ex.: 10000 100000 1000000 5000000)")
+    parser.add_argument("--mapeamento", default=os.path.join(RAIZ, 'column_mappings.json'))
+    parser.add_argument("--dialeto", type=int, default=0, help="Índice do apelido usado em cada cabeçalho")
+    parser.add_argument("--modo", choices=["inserir", "upsert"], default="inserir")
+    parser.add_argument("--tamanho-lote", type=int, default=pipeline.TAMANHO_LOTE)
+    parser.add_argument("--tamanho-bloco", type=int, help="Usar a leitura em blocos com este tamanho")
+    parser.add_argument("--pasta", help="Pasta para os CSVs gerados e os bancos SQLite (padrão: temporária)")
+    parser.add_argument("--saida", help="Gravar os registros de métricas neste arquivo JSON")
+    args = parser.parse_args(argv)
+
+    pasta = args.pasta or tempfile.mkdtemp(prefix="bench_etl_")
+    os.makedirs(pasta, exist_ok=True)
+
+    registros = []
+    for linhas in args.linhas:
+        arquivo_csv = os.path.join(pasta, f"catalogo_{linhas}_d{args.dialeto}.csv")
+        # Catálogos já gerados são reaproveitados entre execuções
+        if not os.path.exists(arquivo_csv):
+            gerar_csv(arquivo_csv, linhas, args.mapeamento, args.dialeto)
+        registro = executar_rodada(arquivo_csv, linhas, pasta, args)
+        imprimir_rodada(registro)
+        registros.append(registro)
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(registros, f, ensure_ascii=False, indent=4)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Gerador de catálogos sintéticos de produtos para os benchmarks.
+# Os cabeçalhos usam os apelidos do column_mappings.json e os dados imitam os arquivos
+# dos fornecedores: valores nulos, descrições com espaços/minúsculas e duplicados.
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Proporção de valores nulos por coluna canônica
+TAXAS_NULOS = {
+    "Unidade": 0.10,
+    "Custo": 0.15,
+    "Unitário": 0.10,
+    "CódigoBarras": 0.20,
+    "Cest": 0.85,
+}
+
+# Proporção de linhas que repetem a descrição de outra linha (com espaços/maiúsculas diferentes)
+TAXA_DUPLICADOS = 0.02
+
+# Proporção de linhas com margem informada que não confere com custo/unitário
+TAXA_MARGEM_INCORRETA = 0.05
+
+PALAVRAS = np.array([
+    "acabamento", "acolchoado", "acrilico", "adaptador", "almofada", "arruela", "bandeja", "barra",
+    "borracha", "capacho", "cabo", "cantoneira", "chapa", "conector", "cortina", "divisoria",
+    "eva", "espuma", "fita", "grade", "kit", "lona", "manta", "mola", "painel", "parafuso",
+    "perfil", "placa", "porca", "puxador", "suporte", "tampa", "trilho", "tubo", "vinil",
+])
+UNIDADES = np.array(["UN", "KG", "CX", "MT", "PC", "LT", "M2"])
+NCMS = np.array(["87169090", "58110000", "39181000", "73181500", "40169990", "39269090", "76109000"])
+MARGENS = np.array([0.0, 30.0, 50.0, 100.0])
+
+# Função para calcular o dígito verificador EAN-13 de um array de prefixos de 12 dígitos
+def digito_ean13(prefixos):
+    digitos = (prefixos[:, None] // (10 ** np.arange(11, -1, -1))) % 10
+    pesos = np.tile([1, 3], 6)
+    soma = (digitos * pesos).sum(axis=1)
+    return (10 - soma % 10) % 10
+
+# Função para escolher o cabeçalho de cada coluna canônica a partir dos apelidos do mapeamento
+def escolher_cabecalhos(column_mappings, dialeto=0):
+    return {key: aliases[dialeto % len(aliases)] for key, aliases in column_mappings.items()}
+
+# Função para aplicar a taxa de nulos em uma coluna
+def com_nulos(rng, valores, taxa):
+    serie = pd.Series(valores)
+    return serie.mask(rng.random(len(serie)) < taxa)
+
+# Função para gerar o catálogo sintético como DataFrame
+def gerar_catalogo(linhas, column_mappings, dialeto=0, semente=42):
+    rng = np.random.default_rng(semente)
+    cabecalhos = escolher_cabecalhos(column_mappings, dialeto)
+
+    ids = rng.permutation(linhas) + 100000
+
+    # Descrições: duas palavras + medida, com espaços à esquerda e minúsculas em parte das linhas
+    palavra1 = pd.Series(PALAVRAS[rng.integers(0, len(PALAVRAS), linhas)])
+    palavra2 = pd.Series(PALAVRAS[rng.integers(0, len(PALAVRAS), linhas)])
+    medida = pd.Series(rng.integers(1, 400, linhas).astype(str))
+    descricoes = (palavra1 + " " + palavra2 + " " + medida + " X " + pd.Series(ids.astype(str))).str.upper()
+    minusculas = rng.random(linhas) < 0.2
+    descricoes[minusculas] = descricoes[minusculas].str.lower()
+    com_espaco = rng.random(linhas) < 0.3
+    descricoes[com_espaco] = " " + descricoes[com_espaco]
+    duplicados = np.flatnonzero(rng.random(linhas) < TAXA_DUPLICADOS)
+    origem = rng.integers(0, linhas, len(duplicados))
+    descricoes.iloc[duplicados] = descricoes.iloc[origem].to_numpy()
+
+    # Preços: unitário calculado a partir do custo e da margem, com parte das margens incorretas
+    custo = np.round(rng.uniform(1, 2000, linhas), 4)
+    margem = MARGENS[rng.integers(0, len(MARGENS), linhas)]
+    unitario = np.round(custo * (1 + margem / 100), 4)
+    incorretas = rng.random(linhas) < TAXA_MARGEM_INCORRETA
+    margem = np.where(incorretas, margem + rng.integers(1, 50, linhas), margem)
+
+    prefixos = 789000000000 + rng.integers(0, 999999999, linhas)
+    barras = (prefixos * 10 + digito_ean13(prefixos)).astype(str)
+
+    cest = pd.Series(rng.integers(1000000, 9999999, linhas).astype(str))
+
+    dados = {
+        cabecalhos["ID"]: ids,
+        cabecalhos["Produto"]: descricoes,
+        cabecalhos["Unidade"]: com_nulos(rng, UNIDADES[rng.integers(0, len(UNIDADES), linhas)], TAXAS_NULOS["Unidade"]),
+        cabecalhos["Ncm"]: NCMS[rng.integers(0, len(NCMS), linhas)],
+        cabecalhos["Cest"]: com_nulos(rng, cest, TAXAS_NULOS["Cest"]),
+        cabecalhos["Custo"]: com_nulos(rng, custo, TAXAS_NULOS["Custo"]),
+        cabecalhos["Margem"]: margem,
+        cabecalhos["Unitário"]: com_nulos(rng, unitario, TAXAS_NULOS["Unitário"]),
+        cabecalhos["CódigoBarras"]: com_nulos(rng, barras, TAXAS_NULOS["CódigoBarras"]),
+    }
+    return pd.DataFrame(dados)
+
+# Função para gerar o catálogo e gravá-lo em CSV
+def gerar_csv(caminho, linhas, column_mappings_file=os.path.join(RAIZ, 'column_mappings.json'), dialeto=0, semente=42):
+    with open(column_mappings_file, 'r', encoding='utf-8') as f:
+        column_mappings = json.load(f)
+    df = gerar_catalogo(linhas, column_mappings, dialeto, semente)
+    df.to_csv(caminho, index=False, float_format='%.4f')
+    return caminho
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera um catálogo sintético de produtos em CSV.")
+    parser.add_argument("saida", help="Arquivo CSV de saída")
+    parser.add_argument("--linhas", type=int, default=10000)
+    parser.add_argument("--mapeamento", default=os.path.join(RAIZ, 'column_mappings.json'))
+    parser.add_argument("--dialeto", type=int, default=0, help="Índice do apelido usado em cada cabeçalho")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args(argv)
+    gerar_csv(args.saida, args.linhas, args.mapeamento, args.dialeto, args.semente)
+    print(f"{args.saida}: {args.linhas} linhas geradas")
+
+if __name__ == "__main__":
+    main()
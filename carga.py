@@ -0,0 +1,110 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from pipeline import ARQUIVO_MAPEAMENTO, FUNCOES_INSERCAO, TAMANHO_LOTE, ConjuntoTratado, ler_csv_tratado
+
+# Carga de várias tabelas de uma vez: Produtos primeiro e, em seguida, as tabelas
+# filhas (ProdPreco e CodBarras, que referenciam ID_Prod) em paralelo.
+
+# Tabelas que precisam ser carregadas antes de cada tabela de destino
+DEPENDENCIAS = {
+    "produtos": [],
+    "precos": ["produtos"],
+    "codbarras": ["produtos"],
+}
+
+# Pool simples de conexões reutilizáveis; cada conexão é usada por uma thread de cada vez.
+# Uma conexão que falhou durante o uso é fechada e descartada: a vaga fica livre para uma nova.
+class PoolConexoes:
+    def __init__(self, fabrica, tamanho=2):
+        self.fabrica = fabrica
+        self.tamanho = tamanho
+        self._livres = []
+        self._criadas = []
+        self._condicao = threading.Condition()
+
+    def _obter(self):
+        with self._condicao:
+            while not self._livres and len(self._criadas) >= self.tamanho:
+                self._condicao.wait()
+            if self._livres:
+                return self._livres.pop()
+            conn = self.fabrica()
+            self._criadas.append(conn)
+            return conn
+
+    def _devolver(self, conn):
+        with self._condicao:
+            self._livres.append(conn)
+            self._condicao.notify()
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._condicao:
+            if conn in self._criadas:
+                self._criadas.remove(conn)
+            self._condicao.notify()
+
+    @contextmanager
+    def conexao(self):
+        conn = self._obter()
+        try:
+            yield conn
+        except BaseException:
+            self._descartar(conn)
+            raise
+        self._devolver(conn)
+
+    def fechar(self):
+        with self._condicao:
+            for conn in self._criadas:
+                conn.close()
+            self._criadas = []
+            self._livres = []
+            self._condicao.notify_all()
+
+# Função para carregar uma tabela usando uma conexão do pool (uma transação por tabela)
+def _carregar_tabela(tabela, df, pool, column_mappings_file, tamanho_lote, telemetria=None, modo="inserir"):
+    try:
+        with pool.conexao() as conn:
+            linhas = FUNCOES_INSERCAO[tabela](df, {}, column_mappings_file, conn, tamanho_lote, commit_a_cada=None, telemetria=telemetria, modo=modo)
+        return {"status": "ok", "linhas": linhas, "erro": None}
+    except Exception as e:
+        return {"status": "erro", "linhas": 0, "erro": str(e)}
+
+# Função para carregar as projeções já montadas (tabela -> DataFrame), respeitando as dependências:
+# cada "onda" só começa quando a anterior terminou, e tabelas cuja dependência falhou não são carregadas
+def carregar_tabelas_concorrente(projecoes, pool, column_mappings_file=ARQUIVO_MAPEAMENTO, tamanho_lote=TAMANHO_LOTE, max_threads=2, telemetria=None, modo="inserir"):
+    resultado = {}
+    pendentes = list(projecoes)
+
+    with ThreadPoolExecutor(max_workers=max_threads) as executor:
+        while pendentes:
+            prontas = [t for t in pendentes if all(d in resultado or d not in projecoes for d in DEPENDENCIAS.get(t, []))]
+            futuros = {}
+            for tabela in prontas:
+                pendentes.remove(tabela)
+                falhas = [d for d in DEPENDENCIAS.get(tabela, []) if d in resultado and resultado[d]["status"] != "ok"]
+                if falhas:
+                    resultado[tabela] = {"status": "ignorada", "linhas": 0, "erro": f"Falha na carga de: {', '.join(falhas)}"}
+                else:
+                    futuros[tabela] = executor.submit(_carregar_tabela, tabela, projecoes[tabela], pool, column_mappings_file, tamanho_lote, telemetria, modo)
+            for tabela, futuro in futuros.items():
+                resultado[tabela] = futuro.result()
+
+    return resultado
+
+# Função para montar as projeções e carregar todas as tabelas escolhidas a partir do DataFrame tratado
+def carregar_todas_tabelas(df, colunas, pool, tabelas=("produtos", "precos", "codbarras"), column_mappings_file=ARQUIVO_MAPEAMENTO, tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir"):
+    conjunto = ConjuntoTratado(df, colunas, column_mappings_file, telemetria)
+    projecoes = {tabela: conjunto.projecao(tabela) for tabela in tabelas}
+    return carregar_tabelas_concorrente(projecoes, pool, column_mappings_file, tamanho_lote, telemetria=telemetria, modo=modo)
+
+# Função para importar um arquivo CSV completo com a carga concorrente das tabelas
+def importar_csv_concorrente(caminho, pool, column_mappings_file=ARQUIVO_MAPEAMENTO, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir"):
+    df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+    return carregar_todas_tabelas(df, colunas, pool, tabelas, column_mappings_file, tamanho_lote, telemetria, modo)
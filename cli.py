@@ -0,0 +1,238 @@
+import argparse
+import json
+import os
+import sys
+
+# Linha de comando para importações sem interface (cron, workers).
+# O módulo pipeline (pandas/numpy) só é importado depois da leitura dos argumentos.
+
+TABELAS = ["produtos", "precos", "codbarras"]
+
+# Função para montar o parser de argumentos da linha de comando
+def criar_parser():
+    parser = argparse.ArgumentParser(description="Importação de Dados (Via Processo ETL) sem interface gráfica.")
+    parser.add_argument("arquivos", nargs="+", help="Arquivo(s) CSV a importar (com --lote, também diretórios ou padrões glob)")
+    parser.add_argument("--mapeamento", default="column_mappings.json", help="Arquivo JSON com o mapeamento de colunas")
+    destino = parser.add_mutually_exclusive_group()
+    destino.add_argument("--dsn", help="String de conexão ODBC do banco de destino")
+    destino.add_argument("--sqlite", help="Arquivo SQLite de destino (testes locais)")
+    parser.add_argument("--tabelas", nargs="+", choices=TABELAS, default=TABELAS, help="Tabelas de destino, na ordem de carga")
+    parser.add_argument("--substituir-id", action="store_true", help="Substituir a coluna ID por sequência numérica")
+    parser.add_argument("--modo", choices=["inserir", "upsert", "delta"], default="inserir", help="inserir: INSERT em lotes; upsert: staging + MERGE (atualiza registros existentes); delta: envia só as linhas novas ou alteradas desde a última importação")
+    parser.add_argument("--impressoes", default="impressoes.db", help="Arquivo SQLite local com as impressões digitais do modo delta")
+    parser.add_argument("--relatar-remocoes", action="store_true", help="No modo delta, listar os IDs que não vieram no arquivo (e esquecê-los no armazém local)")
+    parser.add_argument("--tamanho-lote", type=int, default=1000, help="Quantidade de linhas por executemany")
+    parser.add_argument("--tamanho-bloco", type=int, help="Ler o CSV em blocos com esta quantidade de linhas (memória limitada)")
+    parser.add_argument("--esteira", action="store_true", help="Ler e tratar o próximo bloco enquanto o bloco atual é inserido (usa --tamanho-bloco)")
+    parser.add_argument("--validar", action="store_true", help="Conferir as chaves com o banco antes de gravar; o arquivo não é carregado se houver conflitos")
+    parser.add_argument("--conflitos", help="Com --validar, gravar o relatório de conflitos neste arquivo CSV")
+    parser.add_argument("--quarentena", help="Carga tolerante a falhas: linhas recusadas pelo banco são isoladas (bisseção dos lotes) e gravadas neste CSV; as demais são confirmadas")
+    parser.add_argument("--auto-mapear", action="store_true", help="Antes de importar, perfilar uma amostra das colunas desconhecidas e gravar no mapeamento as sugestões de alta confiança")
+    parser.add_argument("--paralelo", action="store_true", help="Carregar Produtos e depois Preços e Cód.Barras em paralelo (pool de conexões)")
+    parser.add_argument("--converter", metavar="PASTA", help="Apenas gravar cada CSV tratado em PASTA como arquivo colunar (.feather), sem carregar no banco")
+    parser.add_argument("--lote", action="store_true", help="Tratar os arquivos em processos paralelos e carregá-los com um número limitado de conexões")
+    parser.add_argument("--processos", type=int, help="No modo lote, quantidade de processos de tratamento (padrão: número de CPUs)")
+    parser.add_argument("--conexoes", type=int, default=2, help="No modo lote, quantidade máxima de conexões simultâneas com o banco")
+    parser.add_argument("--metricas", help="Gravar as métricas de cada arquivo (tempos por etapa, linhas/s, memória) neste arquivo JSON")
+    parser.add_argument("--progresso", action="store_true", help="Exibir o progresso das inserções na saída de erro")
+    return parser
+
+# Função para abrir a conexão de destino conforme os argumentos
+def abrir_conexao(args, pipeline):
+    if args.sqlite:
+        import sqlite3
+        # check_same_thread=False: no modo paralelo a conexão é usada por threads do pool (uma de cada vez)
+        return sqlite3.connect(args.sqlite, check_same_thread=False, timeout=60)
+    return pipeline.conectar(args.dsn or pipeline.DADOS_CONEXAO)
+
+# Função para exibir o resultado de um arquivo; retorna True se alguma tabela falhou
+def imprimir_resultado(arquivo, resultado):
+    falhou = False
+    for tabela, info in resultado.items():
+        if isinstance(info, dict) and "novas" in info:
+            print(
+                f"{arquivo}: {tabela} -> {info['linhas']} linhas carregadas "
+                f"({info['novas']} novas, {info['alteradas']} alteradas, {info['inalteradas']} inalteradas)"
+            )
+            removidas = info["removidas"]
+            if isinstance(removidas, list):
+                if removidas:
+                    print(f"{arquivo}: {tabela} -> {len(removidas)} IDs removidos: {', '.join(removidas)}")
+            elif removidas:
+                print(f"{arquivo}: {tabela} -> {removidas} IDs não vieram no arquivo")
+        elif isinstance(info, dict):
+            if info["status"] == "ok":
+                print(f"{arquivo}: {tabela} -> {info['linhas']} linhas carregadas")
+            else:
+                print(f"{arquivo}: {tabela} -> {info['status']}: {info['erro']}", file=sys.stderr)
+                falhou = True
+        else:
+            print(f"{arquivo}: {tabela} -> {info} linhas carregadas")
+    return falhou
+
+# Função para converter os CSVs em arquivos tratados colunares (sem acesso ao banco)
+def converter_arquivos(args):
+    import colunar
+
+    os.makedirs(args.converter, exist_ok=True)
+    codigo_saida = 0
+    for arquivo in args.arquivos:
+        try:
+            print(f"{arquivo}: gravado em {colunar.converter_csv(arquivo, args.converter, args.mapeamento, args.substituir_id)}")
+        except Exception as e:
+            print(f"{arquivo}: erro na conversão: {e}", file=sys.stderr)
+            codigo_saida = 1
+    return codigo_saida
+
+# Função para perfilar as colunas desconhecidas de cada CSV e gravar as sugestões de alta confiança no mapeamento
+def mapear_automaticamente(args):
+    import colunar
+    import perfil
+
+    for arquivo in args.arquivos:
+        if colunar.eh_arquivo_colunar(arquivo) or not os.path.isfile(arquivo):
+            continue
+        sugestoes = perfil.perfilar_arquivo(arquivo, args.mapeamento)
+        aplicadas = perfil.aplicar_sugestoes(sugestoes, args.mapeamento)
+        for sugestao in sugestoes:
+            situacao = "gravada no mapeamento" if sugestao in aplicadas else "confirme manualmente"
+            print(
+                f"{arquivo}: coluna '{sugestao['coluna']}' -> {sugestao['campo']} "
+                f"(confiança {sugestao['confianca']:.0%}, {situacao})", file=sys.stderr
+            )
+
+# Função para executar o modo lote e exibir o relatório consolidado por arquivo
+def executar_lote(args, pipeline):
+    import carga
+    import lote
+
+    pool = carga.PoolConexoes(lambda: abrir_conexao(args, pipeline), tamanho=args.conexoes)
+    try:
+        relatorio = lote.importar_lote(
+            args.arquivos, pool, args.mapeamento, args.tabelas, args.substituir_id, args.tamanho_lote,
+            max_processos=args.processos, modo=args.modo,
+            ao_concluir=(lambda item: print(f"{item['arquivo']}: {item['status']}", file=sys.stderr)) if args.progresso else None,
+        )
+    finally:
+        pool.fechar()
+    print(lote.formatar_relatorio(relatorio))
+    if args.metricas:
+        with open(args.metricas, 'w', encoding='utf-8') as f:
+            json.dump(relatorio, f, ensure_ascii=False, indent=4)
+    return 0 if relatorio and all(item["status"] == "ok" for item in relatorio) else 1
+
+def main(argv=None):
+    parser = criar_parser()
+    args = parser.parse_args(argv)
+    if args.lote and args.modo == "delta":
+        parser.error("o modo delta não está disponível com --lote")
+    if args.validar and (args.lote or args.esteira or args.paralelo or args.tamanho_bloco or args.modo == "delta"):
+        parser.error("--validar só está disponível na importação padrão (arquivo inteiro)")
+    if args.quarentena and (args.modo != "inserir" or args.lote or args.esteira or args.paralelo or args.validar):
+        parser.error("--quarentena só está disponível no modo inserir, na importação padrão ou em blocos")
+    if args.esteira and args.paralelo:
+        parser.error("use --esteira ou --paralelo, não os dois")
+
+    import colunar
+    import pipeline
+    from telemetria import Telemetria
+
+    if args.modo == "delta" and any(colunar.eh_arquivo_colunar(arquivo) for arquivo in args.arquivos):
+        parser.error("o modo delta aceita apenas arquivos CSV")
+
+    if args.auto_mapear:
+        mapear_automaticamente(args)
+    if args.lote:
+        return executar_lote(args, pipeline)
+    if args.converter:
+        return converter_arquivos(args)
+
+    # O modo delta carrega as tabelas em sequência, gravando as impressões após cada uma
+    if args.paralelo and args.modo != "delta":
+        import carga
+        pool = carga.PoolConexoes(lambda: abrir_conexao(args, pipeline), tamanho=2)
+        conexao = None
+    else:
+        pool = None
+        conexao = abrir_conexao(args, pipeline)
+
+    codigo_saida = 0
+    registros = []
+    try:
+        for arquivo in args.arquivos:
+            telemetria = Telemetria()
+            if args.progresso:
+                telemetria.assinar(lambda evento: print(
+                    f"{evento['etapa']}: {int(evento['progresso'] * 100)}% ({evento['decorrido']}s)", file=sys.stderr
+                ))
+            registro = {"arquivo": arquivo, "resultado": None, "erro": None}
+            quarentena = pipeline.Quarentena() if args.quarentena else None
+            try:
+                if colunar.eh_arquivo_colunar(arquivo):
+                    resultado = colunar.importar_tratado(
+                        arquivo, args.mapeamento, conexao, args.tabelas, args.tamanho_lote, telemetria, args.modo
+                    ) if pool is None else carga.carregar_tabelas_concorrente(
+                        {tabela: colunar.ler_projecao(arquivo, tabela, telemetria) for tabela in args.tabelas},
+                        pool, args.mapeamento, args.tamanho_lote, telemetria=telemetria, modo=args.modo
+                    )
+                elif args.modo == "delta":
+                    import delta
+                    resultado = delta.importar_csv_delta(
+                        arquivo, args.mapeamento, conexao,
+                        args.tabelas, args.substituir_id, args.tamanho_lote, telemetria, args.impressoes,
+                        relatar_remocoes=args.relatar_remocoes, esquecer_removidas=args.relatar_remocoes
+                    )
+                elif pool is not None:
+                    resultado = carga.importar_csv_concorrente(
+                        arquivo, pool, args.mapeamento, args.tabelas, args.substituir_id, args.tamanho_lote, telemetria, args.modo
+                    )
+                elif args.validar:
+                    import validacao
+                    resultado = validacao.importar_csv_validado(
+                        arquivo, args.mapeamento, conexao, args.tabelas, args.substituir_id, args.tamanho_lote, telemetria, args.modo
+                    )
+                elif args.esteira:
+                    import esteira
+                    resultado = esteira.importar_csv_esteira(
+                        arquivo, args.mapeamento, conexao, args.tabelas, args.substituir_id, args.tamanho_lote,
+                        args.tamanho_bloco or pipeline.TAMANHO_BLOCO_LEITURA, telemetria, args.modo
+                    )
+                elif args.tamanho_bloco:
+                    resultado = pipeline.importar_csv_em_blocos(
+                        arquivo, args.mapeamento, conexao, args.tabelas, args.substituir_id, args.tamanho_lote, args.tamanho_bloco, telemetria, args.modo, quarentena
+                    )
+                else:
+                    resultado = pipeline.importar_csv(
+                        arquivo, args.mapeamento, conexao, args.tabelas, args.substituir_id, args.tamanho_lote, telemetria, args.modo, quarentena
+                    )
+                registro["resultado"] = resultado
+                if imprimir_resultado(arquivo, resultado):
+                    codigo_saida = 1
+                if quarentena:
+                    quarentena.salvar(args.quarentena)
+                    registro["quarentena"] = len(quarentena)
+                    print(f"{arquivo}: {len(quarentena)} linhas recusadas gravadas em {args.quarentena}", file=sys.stderr)
+            except Exception as e:
+                print(f"{arquivo}: erro na importação: {e}", file=sys.stderr)
+                if getattr(e, "conflitos", None) is not None:
+                    print(e.conflitos.head(20).to_string(index=False), file=sys.stderr)
+                    if args.conflitos:
+                        e.conflitos.assign(arquivo=arquivo).to_csv(
+                            args.conflitos, mode='a', index=False, header=not os.path.exists(args.conflitos)
+                        )
+                registro["erro"] = str(e)
+                codigo_saida = 1
+            registro["metricas"] = telemetria.registro()
+            registros.append(registro)
+        if args.metricas:
+            with open(args.metricas, 'w', encoding='utf-8') as f:
+                json.dump(registros, f, ensure_ascii=False, indent=4)
+    finally:
+        if pool is not None:
+            pool.fechar()
+        else:
+            conexao.close()
+    return codigo_saida
+
+if __name__ == "__main__":
+    sys.exit(main())
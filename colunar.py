@@ -0,0 +1,122 @@
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+from pipeline import (
+    ARQUIVO_MAPEAMENTO,
+    COLUNAS_TABELAS,
+    FUNCOES_INSERCAO,
+    TAMANHO_LOTE,
+    ler_csv_tratado,
+    resolver_custos_unitario_margem,
+)
+from telemetria import medir
+
+# Formato intermediário colunar: o DataFrame tratado (com custos, unitários e margens já resolvidos)
+# é gravado em Feather (Arrow IPC, sem compressão, para poder ser mapeado em memória) ou Parquet,
+# com esquema explícito e colunas com os nomes canônicos do mapeamento. Outras etapas e processos
+# leem apenas as colunas de que precisam, sem reprocessar o CSV.
+
+EXTENSOES_FEATHER = ('.feather', '.arrow')
+EXTENSOES_PARQUET = ('.parquet',)
+
+# Esquema do arquivo tratado (coluna canônica -> tipo Arrow)
+ESQUEMA_TRATADO = pa.schema([
+    ("ID", pa.string()),
+    ("Produto", pa.string()),
+    ("Unidade", pa.string()),
+    ("Ncm", pa.string()),
+    ("Cest", pa.string()),
+    ("Custo", pa.float64()),
+    ("Margem", pa.float64()),
+    ("Unitário", pa.float64()),
+    ("CódigoBarras", pa.string()),
+    ("Custo_Alterado", pa.bool_()),
+    ("Unitario_Alterado", pa.bool_()),
+    ("Margem_Incorreta", pa.bool_()),
+    ("Custo_Zero", pa.bool_()),
+])
+
+# Colunas de cada tabela de destino no arquivo tratado (as de preço incluem os indicadores de ajuste)
+COLUNAS_TABELAS_TRATADO = {
+    **COLUNAS_TABELAS,
+    "precos": COLUNAS_TABELAS["precos"] + ["Custo_Alterado", "Unitario_Alterado", "Margem_Incorreta", "Custo_Zero"],
+}
+
+# Função para verificar se um caminho é de um arquivo tratado colunar
+def eh_arquivo_colunar(caminho):
+    return str(caminho).lower().endswith(EXTENSOES_FEATHER + EXTENSOES_PARQUET)
+
+# Função para converter valores lidos do CSV (ex.: 1234567.0) em texto, mantendo nulos como vazio
+def _como_texto(serie):
+    if pd.api.types.is_float_dtype(serie):
+        return serie.map(lambda x: '' if pd.isna(x) else (str(int(x)) if float(x).is_integer() else str(x)))
+    return serie.astype(object).fillna('').astype(str)
+
+# Função para montar a tabela Arrow do DataFrame tratado, com as colunas renomeadas para os nomes canônicos
+def montar_tabela_arrow(df, colunas, column_mappings_file=ARQUIVO_MAPEAMENTO):
+    df = resolver_custos_unitario_margem(df, colunas, column_mappings_file)
+    dados = {}
+    for campo in ESQUEMA_TRATADO:
+        origem = colunas.get(campo.name, campo.name)
+        if origem is None or origem not in df.columns:
+            continue
+        serie = df[origem]
+        if pa.types.is_string(campo.type):
+            serie = _como_texto(serie)
+        dados[campo.name] = pa.array(serie.to_numpy(), type=campo.type, from_pandas=True)
+    esquema = pa.schema([ESQUEMA_TRATADO.field(nome) for nome in dados])
+    return pa.Table.from_pydict(dados, schema=esquema)
+
+# Função para gravar o DataFrame tratado em Feather ou Parquet (conforme a extensão do arquivo)
+def salvar_tratado(df, colunas, caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, telemetria=None):
+    with medir(telemetria, "gravacao_colunar", len(df)):
+        tabela = montar_tabela_arrow(df, colunas, column_mappings_file)
+        if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+            pq.write_table(tabela, caminho)
+        else:
+            # Sem compressão, para que a leitura possa mapear o arquivo em memória sem cópias
+            feather.write_feather(tabela, caminho, compression='uncompressed')
+    return caminho
+
+# Função para ler apenas as colunas pedidas de um arquivo tratado (mapeado em memória)
+def ler_tratado(caminho, colunas=None, telemetria=None):
+    with medir(telemetria, "leitura_colunar") as etapa:
+        if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+            tabela = pq.read_table(caminho, columns=colunas, memory_map=True)
+        else:
+            tabela = feather.read_table(caminho, columns=colunas, memory_map=True)
+        df = tabela.to_pandas()
+        etapa["linhas"] = len(df)
+    return df
+
+# Função para obter o esquema gravado em um arquivo tratado (sem ler os dados)
+def esquema_tratado(caminho):
+    if str(caminho).lower().endswith(EXTENSOES_PARQUET):
+        return pq.read_schema(caminho, memory_map=True)
+    with pa.memory_map(str(caminho)) as origem:
+        return pa.ipc.open_file(origem).schema
+
+# Função para ler a projeção de uma tabela de destino a partir do arquivo tratado
+def ler_projecao(caminho, tabela, telemetria=None):
+    existentes = set(esquema_tratado(caminho).names)
+    return ler_tratado(caminho, [c for c in COLUNAS_TABELAS_TRATADO[tabela] if c in existentes], telemetria)
+
+# Função para converter um CSV em arquivo tratado colunar
+def converter_csv(caminho, destino, column_mappings_file=ARQUIVO_MAPEAMENTO, substituir_id=False, telemetria=None):
+    df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+    if os.path.isdir(destino):
+        destino = os.path.join(destino, os.path.splitext(os.path.basename(caminho))[0] + '.feather')
+    return salvar_tratado(df, colunas, destino, column_mappings_file, telemetria)
+
+# Função para importar um arquivo tratado colunar; cada tabela lê somente as próprias colunas.
+# Os preços já foram resolvidos na gravação, então não há novo cálculo de margem.
+def importar_tratado(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir"):
+    resultado = {}
+    for tabela in tabelas:
+        projecao = ler_projecao(caminho, tabela, telemetria)
+        resultado[tabela] = FUNCOES_INSERCAO[tabela](projecao, {}, column_mappings_file, conexao, tamanho_lote, telemetria=telemetria, modo=modo)
+    return resultado
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+from pipeline import (
+    ARQUIVO_MAPEAMENTO,
+    DADOS_CONEXAO,
+    FUNCOES_INSERCAO,
+    TAMANHO_LOTE,
+    ConjuntoTratado,
+    eh_sqlite,
+    ler_csv_tratado,
+)
+from telemetria import medir
+
+# Importação incremental: cada linha tratada de cada tabela de destino recebe uma impressão digital
+# (hash de 64 bits das colunas da projeção), guardada por ID em um SQLite local. Numa nova importação,
+# só as linhas novas ou alteradas são enviadas ao banco (via upsert); IDs que sumiram do arquivo
+# podem ser relatados como remoções.
+
+ARQUIVO_IMPRESSOES = 'impressoes.db'
+
+# Armazém local das impressões digitais (destino, tabela de destino, ID) -> hash. O destino identifica
+# o banco onde as linhas foram gravadas: o mesmo arquivo carregado em outro banco é enviado por inteiro.
+class ArmazemImpressoes:
+    def __init__(self, caminho=ARQUIVO_IMPRESSOES, destino=""):
+        self.caminho = caminho
+        self.destino = destino
+        self.conn = sqlite3.connect(caminho)
+        colunas = [linha[1] for linha in self.conn.execute("PRAGMA table_info(impressoes)")]
+        if colunas and "destino" not in colunas:
+            # Armazém de uma versão anterior (sem destino): as impressões são descartadas e refeitas
+            self.conn.execute("DROP TABLE impressoes")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS impressoes (destino TEXT NOT NULL, tabela TEXT NOT NULL, id TEXT NOT NULL, "
+            "hash INTEGER NOT NULL, PRIMARY KEY (destino, tabela, id)) WITHOUT ROWID"
+        )
+        self.conn.commit()
+
+    # Impressões gravadas de uma tabela, como Series indexada pelo ID
+    def carregar(self, tabela):
+        linhas = self.conn.execute("SELECT id, hash FROM impressoes WHERE destino = ? AND tabela = ?", (self.destino, tabela)).fetchall()
+        if not linhas:
+            return pd.Series([], index=pd.Index([], dtype=object), dtype=np.int64)
+        ids, hashes = zip(*linhas)
+        return pd.Series(np.array(hashes, dtype=np.int64), index=pd.Index(ids, dtype=object))
+
+    def gravar(self, tabela, impressoes):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO impressoes (destino, tabela, id, hash) VALUES (?, ?, ?, ?)",
+            zip([self.destino] * len(impressoes), [tabela] * len(impressoes), impressoes.index.tolist(), impressoes.tolist()),
+        )
+        self.conn.commit()
+
+    def remover(self, tabela, ids):
+        self.conn.executemany(
+            "DELETE FROM impressoes WHERE destino = ? AND tabela = ? AND id = ?", [(self.destino, tabela, i) for i in ids]
+        )
+        self.conn.commit()
+
+    def limpar(self, tabela=None):
+        if tabela is None:
+            self.conn.execute("DELETE FROM impressoes WHERE destino = ?", (self.destino,))
+        else:
+            self.conn.execute("DELETE FROM impressoes WHERE destino = ? AND tabela = ?", (self.destino, tabela))
+        self.conn.commit()
+
+    def fechar(self):
+        self.conn.close()
+
+# Função para identificar o banco de destino de uma conexão (arquivo do SQLite ou servidor/banco do SQL Server);
+# sem conexão, as inserções usam a conexão padrão
+def identificar_destino(conexao=None):
+    if conexao is None:
+        return DADOS_CONEXAO
+    if eh_sqlite(conexao):
+        arquivo = conexao.execute("PRAGMA database_list").fetchone()[2]
+        return f"sqlite:{os.path.abspath(arquivo) if arquivo else ':memory:'}"
+    cursor = conexao.cursor()
+    try:
+        servidor, banco = cursor.execute("SELECT @@SERVERNAME, DB_NAME()").fetchone()
+    finally:
+        cursor.close()
+    return f"sqlserver:{servidor}/{banco}"
+
+# Função para calcular as impressões digitais de uma projeção (vetorizado, uma por linha, indexadas pelo ID)
+def calcular_impressoes(projecao, coluna_id):
+    hashes = pd.util.hash_pandas_object(projecao, index=False).to_numpy().view(np.int64)
+    return pd.Series(hashes, index=pd.Index(projecao[coluna_id].astype(str).to_numpy(), dtype=object))
+
+# Função para separar as linhas novas e alteradas de uma projeção, comparando com as impressões gravadas
+def calcular_delta(projecao, coluna_id, gravadas):
+    # Como no upsert, vale a última linha de cada ID
+    projecao = projecao.drop_duplicates(coluna_id, keep='last')
+    impressoes = calcular_impressoes(projecao, coluna_id)
+    anteriores = gravadas.reindex(impressoes.index)
+    novas = anteriores.isna().to_numpy()
+    alteradas = ~novas & (anteriores.to_numpy() != impressoes.to_numpy())
+    enviar = novas | alteradas
+    removidas = gravadas.index.difference(impressoes.index)
+    return {
+        "projecao": projecao[enviar],
+        "impressoes": impressoes[enviar],
+        "novas": int(novas.sum()),
+        "alteradas": int(alteradas.sum()),
+        "inalteradas": int(len(projecao) - enviar.sum()),
+        "removidas": removidas.tolist(),
+    }
+
+# Função para carregar apenas o delta de cada tabela; as impressões só são gravadas após a carga da tabela
+def carregar_tabelas_delta(df, colunas, tabelas, armazem, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tamanho_lote=TAMANHO_LOTE, telemetria=None, relatar_remocoes=False, esquecer_removidas=False):
+    resultado = {}
+    conjunto = ConjuntoTratado(df, colunas, column_mappings_file, telemetria)
+    for tabela in tabelas:
+        projecao = conjunto.projecao(tabela)
+        with medir(telemetria, f"delta:{tabela}", len(projecao)):
+            delta = calcular_delta(projecao, colunas["ID"], armazem.carregar(tabela))
+        linhas = 0
+        if len(delta["projecao"]):
+            linhas = FUNCOES_INSERCAO[tabela](delta["projecao"], colunas, column_mappings_file, conexao, tamanho_lote, telemetria=telemetria, modo="upsert")
+            armazem.gravar(tabela, delta["impressoes"])
+        if esquecer_removidas and delta["removidas"]:
+            armazem.remover(tabela, delta["removidas"])
+        resultado[tabela] = {
+            "linhas": linhas,
+            "novas": delta["novas"],
+            "alteradas": delta["alteradas"],
+            "inalteradas": delta["inalteradas"],
+            "removidas": delta["removidas"] if relatar_remocoes else len(delta["removidas"]),
+        }
+    return resultado
+
+# Função para importar um arquivo CSV enviando ao banco somente as linhas novas ou alteradas
+def importar_csv_delta(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, telemetria=None, arquivo_impressoes=ARQUIVO_IMPRESSOES, relatar_remocoes=False, esquecer_removidas=False):
+    df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+    armazem = ArmazemImpressoes(arquivo_impressoes, identificar_destino(conexao))
+    try:
+        return carregar_tabelas_delta(df, colunas, tabelas, armazem, column_mappings_file, conexao, tamanho_lote, telemetria, relatar_remocoes, esquecer_removidas)
+    finally:
+        armazem.fechar()
@@ -0,0 +1,78 @@
+import queue
+import threading
+
+from pipeline import (
+    ARQUIVO_MAPEAMENTO,
+    FUNCOES_INSERCAO,
+    TAMANHO_BLOCO_LEITURA,
+    TAMANHO_LOTE,
+    ConjuntoTratado,
+    ler_csv_em_blocos,
+    obter_mapeamento,
+)
+from telemetria import medir
+
+# Importação em esteira: uma thread produtora lê, trata e projeta o bloco N+1 enquanto o bloco N
+# é inserido no banco. As etapas são ligadas por uma fila limitada; quando o banco é mais lento,
+# a produtora fica bloqueada na fila (a memória não cresce além de alguns blocos).
+
+# Quantidade máxima de blocos prontos aguardando a inserção
+BLOCOS_EM_FILA = 2
+
+_FIM = object()
+
+# Função da thread produtora: lê e trata os blocos e coloca as projeções na fila
+def _produzir(caminho, column_mappings_file, tabelas, substituir_id, tamanho_bloco, fila, parar, telemetria):
+    try:
+        column_mappings = obter_mapeamento(column_mappings_file)
+        for bloco, colunas in ler_csv_em_blocos(caminho, column_mappings, substituir_id, tamanho_bloco, telemetria):
+            conjunto = ConjuntoTratado(bloco, colunas, column_mappings_file, telemetria)
+            projecoes = {tabela: conjunto.projecao(tabela) for tabela in tabelas}
+            # Espera por espaço na fila, verificando periodicamente se a consumidora desistiu
+            with medir(telemetria, "espera_fila_produtora"):
+                while not parar.is_set():
+                    try:
+                        fila.put((projecoes, colunas), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+            if parar.is_set():
+                return
+        fila.put(_FIM)
+    except Exception as e:
+        fila.put(e)
+
+# Função para importar um arquivo CSV em esteira (leitura/tratamento sobrepostos à inserção)
+def importar_csv_esteira(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO_LEITURA, telemetria=None, modo="inserir", blocos_em_fila=BLOCOS_EM_FILA):
+    fila = queue.Queue(maxsize=blocos_em_fila)
+    parar = threading.Event()
+    produtora = threading.Thread(
+        target=_produzir,
+        args=(caminho, column_mappings_file, tabelas, substituir_id, tamanho_bloco, fila, parar, telemetria),
+        name="esteira-leitura",
+        daemon=True,
+    )
+    produtora.start()
+
+    resultado = dict.fromkeys(tabelas, 0)
+    try:
+        while True:
+            with medir(telemetria, "espera_fila_consumidora"):
+                item = fila.get()
+            if item is _FIM:
+                break
+            if isinstance(item, Exception):
+                raise item
+            projecoes, colunas = item
+            for tabela in tabelas:
+                resultado[tabela] += FUNCOES_INSERCAO[tabela](projecoes[tabela], colunas, column_mappings_file, conexao, tamanho_lote, telemetria=telemetria, modo=modo)
+    finally:
+        # Em caso de erro na inserção, libera a produtora e descarta os blocos já tratados
+        parar.set()
+        while produtora.is_alive():
+            try:
+                fila.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        produtora.join()
+    return resultado
@@ -1,5 +1,3 @@
-import streamlit as st
-from streamlit_calendar import calendar
 import subprocess
 
-subprocess.Popen(["streamlit", "run", "main.py"])
\ No newline at end of file
+subprocess.Popen(["streamlit", "run", "main.py"])
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+# Leitura tipada do CSV: os tipos de cada coluna vêm dos campos canônicos do column_mappings.json
+# (em vez da inferência do pandas). Códigos (ID, NCM, CEST, código de barras) são lidos como texto,
+# Unidade como categoria e os valores monetários como float, aceitando o formato pt-BR (1.380,10).
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    MOTOR_CSV = 'pyarrow'
+except ImportError:
+    MOTOR_CSV = 'c'
+
+# Tipo de leitura de cada campo canônico
+TIPOS_CAMPOS = {
+    "ID": "texto",
+    "Produto": "texto",
+    "Unidade": "categoria",
+    "Ncm": "texto",
+    "Cest": "texto",
+    "Custo": "dinheiro",
+    "Margem": "dinheiro",
+    "Unitário": "dinheiro",
+    "CódigoBarras": "texto",
+}
+
+# Função para montar o esquema de leitura (dtype por coluna do arquivo) a partir do cabeçalho
+def esquema_leitura(colunas_arquivo, column_mappings):
+    colunas = column_mappings.resolver(colunas_arquivo)
+    dtype = {}
+    colunas_dinheiro = []
+    for key, tipo in TIPOS_CAMPOS.items():
+        coluna = colunas.get(key)
+        if coluna is None:
+            continue
+        if tipo == "categoria":
+            dtype[coluna] = "category"
+        elif tipo == "texto":
+            dtype[coluna] = str
+        else:
+            # Valores monetários ficam com a inferência numérica do leitor; só as colunas que
+            # vierem como texto (vírgula decimal do pt-BR) são convertidas depois
+            colunas_dinheiro.append(coluna)
+    return dtype, colunas_dinheiro
+
+# Função para converter valores monetários em texto para float. O formato é decidido para a coluna
+# inteira: se algum valor tem vírgula decimal, todos são lidos em pt-BR ("1.380" = 1380, "1.380,10" = 1380.1);
+# senão o ponto é o separador decimal ("1380.10")
+def converter_dinheiro(serie):
+    texto = serie.str.strip()
+    if texto.str.contains(',', regex=False, na=False).any():
+        texto = texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False)
+    return pd.to_numeric(texto, errors='coerce')
+
+# Função para converter as colunas monetárias de um DataFrame lido como texto
+def _converter_colunas_dinheiro(df, colunas_dinheiro):
+    for coluna in colunas_dinheiro:
+        if not pd.api.types.is_numeric_dtype(df[coluna]):
+            df[coluna] = converter_dinheiro(df[coluna].astype(object).astype(str).mask(df[coluna].isna()))
+    return df
+
+# Função para ler apenas o cabeçalho do CSV (voltando ao início quando a entrada é um buffer)
+def ler_cabecalho(caminho):
+    colunas = pd.read_csv(caminho, nrows=0).columns
+    if hasattr(caminho, 'seek'):
+        caminho.seek(0)
+    return colunas
+
+# Função para ler o CSV inteiro com os tipos definidos pelo mapeamento (motor pyarrow quando disponível)
+def ler_csv_tipado(caminho, column_mappings, motor=None):
+    dtype, colunas_dinheiro = esquema_leitura(ler_cabecalho(caminho), column_mappings)
+    motor = motor or MOTOR_CSV
+    if motor != 'pyarrow':
+        df = pd.read_csv(caminho, dtype=dtype, engine=motor)
+        return _converter_colunas_dinheiro(df, colunas_dinheiro)
+
+    # O pyarrow.csv recebe os tipos na própria leitura (pd.read_csv(engine='pyarrow') converteria depois,
+    # transformando 87169090 em "87169090.0"); textos ausentes voltam a ser NaN, como no motor C
+    tipos = {coluna: pa.string() if tipo is str else pa.dictionary(pa.int32(), pa.string()) for coluna, tipo in dtype.items()}
+    tabela = pa_csv.read_csv(caminho, convert_options=pa_csv.ConvertOptions(column_types=tipos, strings_can_be_null=True))
+    df = tabela.to_pandas()
+    for coluna, tipo in dtype.items():
+        if tipo is str:
+            df[coluna] = df[coluna].to_numpy(dtype=object, na_value=np.nan)
+    return _converter_colunas_dinheiro(df, colunas_dinheiro)
+
+# Função para ler o CSV em blocos com os mesmos tipos em todos os blocos (o motor pyarrow não lê em blocos)
+def ler_csv_tipado_em_blocos(caminho, column_mappings, tamanho_bloco):
+    dtype, colunas_dinheiro = esquema_leitura(ler_cabecalho(caminho), column_mappings)
+    for bloco in pd.read_csv(caminho, dtype=dtype, chunksize=tamanho_bloco):
+        yield _converter_colunas_dinheiro(bloco, colunas_dinheiro)
@@ -0,0 +1,112 @@
+import glob
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from carga import carregar_todas_tabelas
+from pipeline import ARQUIVO_MAPEAMENTO, TAMANHO_LOTE, ler_csv_tratado
+from telemetria import Telemetria
+
+# Importação em lote de vários arquivos de fornecedores: a leitura e o tratamento de cada arquivo
+# rodam em um pool de processos (cada arquivo resolve o próprio cabeçalho pelo column_mappings.json)
+# e a carga é feita no processo principal, com um número limitado de conexões (carga.PoolConexoes).
+
+# Função para expandir diretórios, padrões glob e arquivos em uma lista ordenada de CSVs
+def expandir_entradas(entradas):
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = glob.glob(os.path.join(entrada, '*.csv'))
+        elif glob.has_magic(entrada):
+            encontrados = glob.glob(entrada)
+        else:
+            encontrados = [entrada]
+        for arquivo in sorted(encontrados):
+            if arquivo not in arquivos:
+                arquivos.append(arquivo)
+    return arquivos
+
+# Função executada nos processos de trabalho: lê e trata um arquivo (sem acesso ao banco)
+def preparar_arquivo(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, substituir_id=False):
+    telemetria = Telemetria()
+    try:
+        df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+        return {"arquivo": caminho, "df": df, "colunas": colunas, "erro": None, "metricas": telemetria.registro()}
+    except Exception as e:
+        return {"arquivo": caminho, "df": None, "colunas": None, "erro": f"tratamento: {e}", "metricas": telemetria.registro()}
+
+# Função executada no processo principal: carrega um arquivo já tratado usando o pool de conexões
+def _carregar_arquivo(preparado, pool, tabelas, column_mappings_file, tamanho_lote, modo):
+    telemetria = Telemetria()
+    resultado = carregar_todas_tabelas(preparado["df"], preparado["colunas"], pool, tabelas, column_mappings_file, tamanho_lote, telemetria, modo)
+    return resultado, telemetria.registro()
+
+# Função para importar vários arquivos: tratamento em processos paralelos e carga com conexões limitadas.
+# Cada arquivo é carregado assim que o seu tratamento termina; o relatório final segue a ordem dos arquivos.
+def importar_lote(entradas, pool, column_mappings_file=ARQUIVO_MAPEAMENTO, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, max_processos=None, max_cargas=None, modo="inserir", ao_concluir=None):
+    arquivos = expandir_entradas(entradas)
+    relatorio = {arquivo: {"arquivo": arquivo, "status": "pendente", "linhas_tratadas": 0, "resultado": None, "erro": None, "metricas": {}} for arquivo in arquivos}
+    lock = threading.Lock()
+
+    def concluir(arquivo, futuro):
+        item = relatorio[arquivo]
+        try:
+            item["resultado"], item["metricas"]["carga"] = futuro.result()
+            falhas = [tabela for tabela, info in item["resultado"].items() if info["status"] != "ok"]
+            item["status"] = "erro" if falhas else "ok"
+            if falhas:
+                item["erro"] = f"carga: falha em {', '.join(falhas)}"
+        except Exception as e:
+            item["status"] = "erro"
+            item["erro"] = f"carga: {e}"
+        if ao_concluir is not None:
+            with lock:
+                ao_concluir(item)
+
+    max_cargas = max_cargas or pool.tamanho
+    with ProcessPoolExecutor(max_workers=max_processos) as processos, ThreadPoolExecutor(max_workers=max_cargas) as cargas:
+        futuros = {processos.submit(preparar_arquivo, arquivo, column_mappings_file, substituir_id): arquivo for arquivo in arquivos}
+        cargas_pendentes = []
+        for futuro in as_completed(futuros):
+            arquivo = futuros[futuro]
+            item = relatorio[arquivo]
+            try:
+                preparado = futuro.result()
+            except Exception as e:
+                # Falha do próprio processo de trabalho (ex.: processo encerrado)
+                preparado = {"erro": f"tratamento: {e}", "metricas": {}}
+            if preparado["erro"]:
+                item["status"] = "erro"
+                item["erro"] = preparado["erro"]
+                item["metricas"]["tratamento"] = preparado["metricas"]
+                if ao_concluir is not None:
+                    with lock:
+                        ao_concluir(item)
+                continue
+            item["linhas_tratadas"] = len(preparado["df"])
+            item["metricas"]["tratamento"] = preparado["metricas"]
+            carga = cargas.submit(_carregar_arquivo, preparado, pool, tabelas, column_mappings_file, tamanho_lote, modo)
+            carga.add_done_callback(lambda f, arquivo=arquivo: concluir(arquivo, f))
+            cargas_pendentes.append(carga)
+        for carga in cargas_pendentes:
+            carga.exception()
+
+    return [relatorio[arquivo] for arquivo in arquivos]
+
+# Função para formatar o relatório consolidado (uma linha por arquivo e tabela)
+def formatar_relatorio(relatorio):
+    linhas = []
+    for item in relatorio:
+        if item["status"] == "ok" or item["resultado"]:
+            detalhes = ", ".join(
+                f"{tabela}={info['linhas']}" if info["status"] == "ok" else f"{tabela}={info['status']}"
+                for tabela, info in item["resultado"].items()
+            )
+            linhas.append(f"{item['status'].upper():<5} {item['arquivo']}: {item['linhas_tratadas']} linhas tratadas | {detalhes}")
+        else:
+            linhas.append(f"{item['status'].upper():<5} {item['arquivo']}")
+        if item["erro"]:
+            linhas.append(f"      {item['erro']}")
+    ok = sum(1 for item in relatorio if item["status"] == "ok")
+    linhas.append(f"{ok}/{len(relatorio)} arquivos importados")
+    return "\n".join(linhas)
@@ -1,145 +1,34 @@
+import hashlib
+import io
+
 import pandas as pd
-import pyodbc
 import streamlit as st
-import json
-import os
-import numpy as np
-
-# Configuração de conexão com o banco de dados
-DADOS_CONEXAO = (
-    "Driver={SQL Server};"
-    "Server=DUXPC;"
-    "Database=Conversao;"
-    "Trusted_Connection=yes;"
-)
-
-# Função para verificar ou criar o mapeamento JSON de colunas
-def verificar_ou_criar_mapeamento_json(file_name='column_mappings.json'):
-    default_mappings = {
-        "ID": ["ID", "Código", "Identificador"],
-        "Produto": ["Produto", "Descrição", "Item"],
-        "Unidade": ["UNIDADE", "Un", "Unidade de Medida", "Unidade"],
-        "Ncm": ["NCM", "ncm", "Ncm"],
-        "Cest": ["CEST", "cest", "Cest"],
-        "Custo": ["Custo", "Preço de Custo", "Valor Custo"],
-        "Margem": ["Margem", "MargemLucro", "Margem de Lucro"],
-        "Unitário": ["Unitário", "Preço Unitário", "Valor Unitário", "Unitario"],
-        "CódigoBarras": ["CodigoBarras", "Código de Barras", "EAN"]
-    }
-
-    if not os.path.exists(file_name):
-        with open(file_name, 'w', encoding='utf-8') as f:
-            json.dump(default_mappings, f, indent=4)
-    else:
-        with open(file_name, 'r', encoding='utf-8') as f:
-            existing_mappings = json.load(f)
-
-        for key, possible_names in default_mappings.items():
-            if key in existing_mappings:
-                for new_name in possible_names:
-                    if new_name not in existing_mappings[key]:
-                        existing_mappings[key].append(new_name)
-        with open(file_name, 'w', encoding='utf-8') as f:
-            json.dump(existing_mappings, f, indent=4)
-    return file_name
-
-verificar_ou_criar_mapeamento_json()
-
-# Função para carregar mapeamento de colunas
-def load_mapping(file_name='column_mappings.json'):
-    try:
-        with open(file_name, 'r') as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return verificar_ou_criar_mapeamento_json(file_name)
-
-# Função para salvar o mapeamento atualizado
-def save_mapping(updated_mapping, file_name='column_mappings.json'):
-    with open(file_name, 'w') as f:
-        json.dump(updated_mapping, f, indent=4)
-
-# Carrega o mapeamento existente ou inicializa
-expected_columns = load_mapping()        
-
-# Função para obter o nome de coluna correspondente no DataFrame
-def get_column_name(df, possible_names):
-    for name in possible_names:
-        if name in df.columns:
-            return name
-    return None
-
-# Função para gerar lista de colunas válidas
-def get_valid_columns(*cols):
-    return [col for col in cols if col is not None]
-
-# Função para manipular custos, unitários e margens
-def resolver_custos_unitario_margem(df, mapping, column_mappings_file='column_mappings.json'):
-    with open(column_mappings_file, 'r', encoding='utf-8') as f:
-        column_mappings = json.load(f)
-
-    custo_col = get_column_name(df, column_mappings["Custo"])
-    unitario_col = get_column_name(df, column_mappings["Unitário"])
-    margem_col = get_column_name(df, column_mappings["Margem"])
-
-    if not custo_col or not unitario_col or not margem_col:
-        raise KeyError("Coluna não encontrada no DataFrame. Verifique os mapeamentos.")
-
-    df = df.copy()
-    df['Custo_Alterado'] = False
-    missing_custo_mask = df[custo_col].isna()
-    df.loc[missing_custo_mask, custo_col] = df[unitario_col]
-    df.loc[missing_custo_mask, 'Custo_Alterado'] = True
-
-    df['Unitario_Alterado'] = False
-    missing_unitario_mask = df[unitario_col].isna()
-    df.loc[missing_unitario_mask, unitario_col] = df[custo_col]
-    df.loc[missing_unitario_mask, 'Unitario_Alterado'] = True
-
-    df['Margem_Incorreta'] = False
-    df_margens_disponiveis = df[pd.notna(df[margem_col])].copy()
-    df_margens_disponiveis['Margem_Calculada'] = (
-        (df_margens_disponiveis[unitario_col] - df_margens_disponiveis[custo_col])
-        / df_margens_disponiveis[custo_col]
-    ) * 100
-
-    margem_mask = np.abs(df_margens_disponiveis[margem_col] - df_margens_disponiveis['Margem_Calculada']) > 0.01
-    df.loc[df_margens_disponiveis.index[margem_mask], margem_col] = df_margens_disponiveis.loc[margem_mask, 'Margem_Calculada']
-    df.loc[df_margens_disponiveis.index[margem_mask], 'Margem_Incorreta'] = True
-
-    # Formatar as colunas de custo e unitário
-    df[custo_col] = df[custo_col].apply(lambda x: f"{float(x):,.2f}".replace(",", "_").replace(".", ",").replace("_", ""))
-    df[unitario_col] = df[unitario_col].apply(lambda x: f"{float(x):,.2f}".replace(",", "_").replace(".", ",").replace("_", ""))
-
-    return df
-
-# Função para inserção genérica de dados no banco de dados
-def inserir_dados(df, colunas_mapeadas, tabela, comando_sql):
-    conn = pyodbc.connect(DADOS_CONEXAO)
-    cursor = conn.cursor()
-    progress_bar = st.progress(0)
-    progress_text = st.empty()
-    total_rows = len(df)
-
-    try:
-        for index, row in df.iterrows():
-            parametros = tuple(row[col] for col in colunas_mapeadas)
-            cursor.execute(comando_sql, parametros)
-
-            progress_value = min((index + 1) / total_rows, 1.0)
-            progress_bar.progress(progress_value)
-            progress_text.text(f"{int(progress_value * 100)}% concluído")
 
-        conn.commit()
-        st.success(f"{tabela} inserido com sucesso!")
-        progress_bar.progress(1.0)
-        progress_text.text("100% concluído")
-
-    except Exception as e:
-        st.error(f"Erro ao inserir {tabela}: {e}")
-
-    finally:
-        cursor.close()
-        conn.close()
+from carga import PoolConexoes, carregar_tabelas_concorrente
+from leitura import ler_csv_tipado
+from mapeamento import versao_mapeamento
+from perfil import aplicar_sugestoes, perfilar_arquivo
+from regras import versao_regras
+from validacao import validar_chaves
+from similares import LIMIAR_SIMILARIDADE, detectar_quase_duplicados, manter_por_padrao, remover_quase_duplicados
+from telemetria import Telemetria
+from pipeline import (
+    ARQUIVO_MAPEAMENTO,
+    ConjuntoTratado,
+    colunas_faltantes,
+    conectar,
+    get_valid_columns,
+    inserir_codigo_barras,
+    inserir_precos,
+    inserir_produtos,
+    limpar_dados,
+    load_mapping,
+    mapear_colunas,
+    obter_mapeamento,
+    save_mapping,
+    tratar_id,
+    verificar_ou_criar_mapeamento_json,
+)
 
 def selecionar_colunas(df, colunas_selecionadas=None):
     mapping = {}
@@ -167,46 +56,147 @@ def selecionar_colunas(df, colunas_selecionadas=None):
 
     return mapping
 
-# Funções específicas de inserção
-def inserir_produtos(df, mapping, column_mappings_file='column_mappings.json'):
-    column_mappings = load_mapping(column_mappings_file)
-    colunas = [get_column_name(df, column_mappings[key]) for key in ["ID", "Produto", "Unidade", "Ncm", "Cest"]]
-    comando_sql = """INSERT INTO Produtos (ID_Prod, Descricao, UN, NCM, CEST) VALUES (?, ?, ?, ?, ?)"""
-    inserir_dados(df, colunas, 'Produtos', comando_sql)
-
-def inserir_precos(df, mapping, column_mappings_file='column_mappings.json'):
-    column_mappings = load_mapping(column_mappings_file)
-
-    colunas = [get_column_name(df, column_mappings[key]) for key in ["ID", "Custo", "Margem", "Unitário"]]
-
-    custo_col = get_column_name(df, column_mappings["Custo"])
-    unitario_col = get_column_name(df, column_mappings["Unitário"])
-
-    # Converter os valores de custo e margem para float
-    df[custo_col] = df[custo_col].str.replace(',', '.').astype(float)
-    df[unitario_col] = df[unitario_col].str.replace(',', '.').astype(float)
-
-    comando_sql = """INSERT INTO ProdPreco (ID_Prod, PrecoCusto, MargemLucro, PrecoUnitario) VALUES (?, ?, ?, ?)"""
+# Função para formatar valores monetários com vírgula decimal (ex.: 1380,10), apenas para exibição
+def formatar_moeda(serie):
+    return serie.map(lambda x: f"{x:.2f}".replace(".", ",") if pd.notna(x) else "")
+
+# Função para montar a cópia de exibição da tabela de preços, com custo e unitário formatados
+def formatar_precos_para_exibicao(df, column_mapping):
+    colunas_moeda = [col for col in (column_mapping["Custo"], column_mapping["Unitário"]) if col in df.columns]
+    return df.assign(**{col: formatar_moeda(df[col]) for col in colunas_moeda})
+
+# Quantidade de linhas exibidas por página nas prévias
+TAMANHO_PAGINA = 100
+
+# Função para exibir apenas uma página do DataFrame (o navegador nunca recebe o arquivo inteiro)
+def exibir_previa(df, chave, formatar=None):
+    total = len(df)
+    paginas = max((total + TAMANHO_PAGINA - 1) // TAMANHO_PAGINA, 1)
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1, key=f"{chave}_pagina")
+    inicio = (pagina - 1) * TAMANHO_PAGINA
+    trecho = df.iloc[inicio:inicio + TAMANHO_PAGINA]
+    st.dataframe(formatar(trecho) if formatar is not None else trecho)
+    st.caption(f"Linhas {min(inicio + 1, total)}–{min(inicio + TAMANHO_PAGINA, total)} de {total}")
+
+# Função para resumir as colunas: nulos, valores distintos e mínimo/máximo das colunas de preço
+def resumir_colunas(df, colunas_numericas=()):
+    resumo = pd.DataFrame({
+        "Nulos": df.isna().sum(),
+        "Distintos": df.nunique(),
+    })
+    colunas_numericas = [col for col in colunas_numericas if col in df.columns]
+    if colunas_numericas:
+        numericos = df[colunas_numericas].apply(pd.to_numeric, errors='coerce')
+        resumo["Mínimo"] = numericos.min()
+        resumo["Máximo"] = numericos.max()
+    return resumo
+
+# Quantidade máxima de entradas mantidas em cada cache (uploads/escolhas diferentes na sessão)
+CACHE_MAX_ENTRADAS = 4
+
+# Função para calcular o hash do conteúdo enviado (reaproveitado enquanto o mesmo upload estiver ativo)
+def calcular_hash_arquivo(uploaded_file):
+    anterior = st.session_state.get('hash_upload')
+    if anterior is not None and anterior[0] == uploaded_file.file_id:
+        return anterior[1]
+    hash_arquivo = hashlib.sha256(uploaded_file.getvalue()).hexdigest()
+    st.session_state['hash_upload'] = (uploaded_file.file_id, hash_arquivo)
+    return hash_arquivo
+
+# Funções em cache: a chave é o hash do arquivo + versão do mapeamento e das regras (+ escolhas do usuário).
+# O conteúdo (_conteudo) não entra no hash do Streamlit, apenas é usado quando a chave não está em cache.
+# Os DataFrames tratados ficam em cache_resource (um único objeto compartilhado, sem desserializar uma
+# cópia a cada interação) e nunca são alterados no lugar.
+@st.cache_resource(max_entries=CACHE_MAX_ENTRADAS, show_spinner="Lendo e tratando o arquivo...")
+def carregar_dados_tratados(hash_arquivo, versao, mapping_file, _conteudo):
+    column_mappings = obter_mapeamento(mapping_file)
+    df = ler_csv_tipado(io.BytesIO(_conteudo), column_mappings)
+    column_mapping = mapear_colunas(df, column_mappings)
+    # Aplicar os tratamentos (duplicados, espaços, maiúsculas, valores nulos, NCM, CEST e código de barras)
+    df = limpar_dados(df, column_mapping)
+    return df, column_mapping
+
+# Conjunto tratado compartilhado pelas três tabelas: as projeções são montadas sobre os mesmos arrays
+# (somente leitura, sem cópia) e as colunas de preço derivadas são calculadas uma única vez
+@st.cache_resource(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def conjunto_tratado_em_cache(hash_arquivo, versao, mapping_file, substituir_id, _conteudo):
+    df, column_mapping = carregar_dados_tratados(hash_arquivo, versao, mapping_file, _conteudo)
+    # tratar_id altera a coluna ID: a cópia preserva o DataFrame compartilhado das demais escolhas
+    return ConjuntoTratado(tratar_id(df.copy(), column_mapping, substituir_id), column_mapping, mapping_file)
+
+# Função para projetar as colunas escolhidas de uma tabela, sem os produtos descartados na revisão
+def projetar_selecao(conjunto, tabela, colunas_selecionadas, removidos):
+    projecao = conjunto.projecao(tabela, colunas_selecionadas)
+    return projecao.drop(index=removidos) if len(removidos) else projecao
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner="Procurando produtos quase duplicados...")
+def detectar_similares_em_cache(hash_arquivo, versao, mapping_file, substituir_id, limiar, _conteudo):
+    conjunto = conjunto_tratado_em_cache(hash_arquivo, versao, mapping_file, substituir_id, _conteudo)
+    return detectar_quase_duplicados(conjunto.df, conjunto.colunas["Produto"], limiar)
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def sugerir_mapeamentos_em_cache(hash_arquivo, versao, mapping_file, _conteudo):
+    return perfilar_arquivo(io.BytesIO(_conteudo), mapping_file)
+
+# Função para exibir os grupos de quase duplicados para revisão; retorna os índices a manter
+def revisar_quase_duplicados(grupos, limiar):
+    if grupos.empty:
+        st.info("Nenhum produto quase duplicado encontrado.")
+        return []
+    st.write(f"{grupos['Grupo'].nunique()} grupos encontrados. Marque em 'Manter' os produtos que devem ser inseridos:")
+    # Por padrão, só ficam desmarcados os produtos com similaridade ao primeiro do grupo de pelo menos o limiar
+    revisao = st.data_editor(
+        grupos.assign(Manter=manter_por_padrao(grupos, limiar)),
+        disabled=["Indice", "Grupo", "Descricao", "Normalizada", "Similaridade"],
+        hide_index=True,
+        key="revisao_similares",
+    )
+    return revisao.loc[revisao["Manter"], "Indice"].tolist()
+
+@st.cache_data(max_entries=CACHE_MAX_ENTRADAS, show_spinner=False)
+def resumir_colunas_em_cache(hash_arquivo, versao, mapping_file, substituir_id, _conteudo):
+    conjunto = conjunto_tratado_em_cache(hash_arquivo, versao, mapping_file, substituir_id, _conteudo)
+    return resumir_colunas(conjunto.df, [conjunto.colunas[key] for key in ("Custo", "Unitário", "Margem") if conjunto.colunas.get(key)])
+
+# Nomes exibidos para cada tabela de destino
+NOMES_TABELAS = {"produtos": "Produtos", "precos": "Preços", "codbarras": "Código de Barras"}
+
+# Pool de conexões compartilhado entre as interações da aplicação
+@st.cache_resource
+def obter_pool_conexoes():
+    return PoolConexoes(conectar, tamanho=2)
+
+# Função para executar uma inserção exibindo barra de progresso e o resultado na tela
+def executar_insercao(funcao_insercao, df, mapping, tabela, column_mappings_file=ARQUIVO_MAPEAMENTO, modo="inserir"):
+    progress_bar = st.progress(0)
+    progress_text = st.empty()
+    telemetria = Telemetria()
 
-    inserir_dados(df, colunas, 'Preços', comando_sql)
+    # Os eventos de progresso já chegam limitados pela telemetria (não um por linha)
+    @telemetria.assinar
+    def atualizar_progresso(evento):
+        progress_bar.progress(evento["progresso"])
+        progress_text.text(f"{int(evento['progresso'] * 100)}% concluído")
 
-def inserir_codigo_barras(df, mapping, column_mappings_file='column_mappings.json'):
-    column_mappings = load_mapping(column_mappings_file)
-    colunas = [get_column_name(df, column_mappings[key]) for key in ["ID", "CódigoBarras"]]
-    comando_sql = """INSERT INTO CodBarras (ID_Prod, Cod_Barras) VALUES (?, ?)"""
-    
-    # Converter apenas a coluna CódigoBarras para string
-    #df[get_column_name(df, column_mappings["CódigoBarras"])] = df[get_column_name(df, column_mappings["CódigoBarras"])].astype(str)
-    df.loc[:, get_column_name(df, column_mappings["CódigoBarras"])] = df[get_column_name(df, column_mappings["CódigoBarras"])].astype(str)
-    
-    inserir_dados(df, colunas, 'Código de Barras', comando_sql)
+    try:
+        funcao_insercao(df, mapping, column_mappings_file, telemetria=telemetria, modo=modo)
+        st.success(f"{tabela} inserido com sucesso!")
+    except Exception as e:
+        st.error(f"Erro ao inserir {tabela}: {e}")
+    exibir_metricas(telemetria)
 
-# Configurações do Streamlit
-st.set_page_config(page_title="Importação de Dados(Processo ETL)", page_icon="🛠️", layout="wide")
+# Função para exibir o registro de métricas (JSON) de uma execução
+def exibir_metricas(telemetria):
+    with st.expander("Métricas da importação"):
+        st.json(telemetria.registro())
 
 def main():
+    # Configurações do Streamlit
+    st.set_page_config(page_title="Importação de Dados(Processo ETL)", page_icon="🛠️", layout="wide")
+
     df1 = None
     condicao = None
+    removidos = []
     
     # Título principal
     st.markdown("<h1 style='text-align: center;'>Importação de Dados (Via Processo ETL)</h1>", unsafe_allow_html=True)
@@ -215,67 +205,22 @@ def main():
     uploaded_file = st.file_uploader("Escolha um arquivo CSV", type=["csv"])
     
     if uploaded_file is not None:
-        df = pd.read_csv(uploaded_file)
-        
         mapping_file = verificar_ou_criar_mapeamento_json()
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-          column_mappings = json.load(f)
-
-        id_column_name = get_column_name(df, column_mappings["ID"])
-        Produto_column_name = get_column_name(df, column_mappings["Produto"])
-        Unidade_column_name = get_column_name(df, column_mappings["Unidade"])
-        ncm_column_name = get_column_name(df, column_mappings["Ncm"])
-        cest_column_name = get_column_name(df, column_mappings["Cest"])
-        barras_column_name = get_column_name(df, column_mappings["CódigoBarras"])
-
-        if Produto_column_name is not None:
-           # Remover linhas duplicadas com base no mapeamento PRODUTO
-           df = df.drop_duplicates(Produto_column_name)
-           # Remover linhas onde a coluna 'Produto' tem valores nulos
-           df = df.dropna(subset=[Produto_column_name])
-           # Remover espaços em branco extras de uma coluna de string
-           df[Produto_column_name] = df[Produto_column_name].str.strip()
-           # Remover espaços em branco à esquerda da coluna 'Produto_column_name'
-           df[Produto_column_name] = df[Produto_column_name].str.lstrip()
-           # Colocar todos os valores em maiúsculas
-           df[Produto_column_name] = df[Produto_column_name].str.upper()   
-
-        if Unidade_column_name is not None:
-           # Preencher valores nulos em uma coluna específica com um valor padrão
-           df[Unidade_column_name] = df[Unidade_column_name].fillna('UN') 
-
-        if ncm_column_name is not None:
-           # Atualizando a coluna 'ncm_column_name' para remover o ponto decimal e converter para string
-           df[ncm_column_name] = df[ncm_column_name].apply(
-           lambda x: str(int(x)) if pd.notna(x) else ''
-           )
-
-        if cest_column_name is not None:
-           # Substituir valores NaN ou None por vazio ('')
-           df[cest_column_name] = df[cest_column_name].fillna('')
-
-        if barras_column_name is not None:   
-           # Preencher valores nulos em uma coluna específica com um valor padrão
-           df[barras_column_name] = df[barras_column_name].fillna(df[id_column_name].astype(str))
-
-           
-
-        if id_column_name is None or Produto_column_name is None or Unidade_column_name is None or ncm_column_name is None or cest_column_name is None or barras_column_name is None:
+        # Carrega o mapeamento existente para a categorização de novas colunas
+        expected_columns = load_mapping(mapping_file)
+
+        # Leitura e tratamento reaproveitados entre as interações (mesmo arquivo, mapeamento e regras de limpeza)
+        conteudo = uploaded_file.getvalue()
+        hash_arquivo = calcular_hash_arquivo(uploaded_file)
+        versao = (versao_mapeamento(mapping_file), versao_regras())
+        df, column_mapping = carregar_dados_tratados(hash_arquivo, versao, mapping_file, conteudo)
+
+        if colunas_faltantes(column_mapping):
             st.error("Colunas não encontrada no DataFrame.Faça o Mapeamento e Tente Novamente.")
             condicao = 1
         
-            # Mapear colunas reais com os nomes esperados
-            column_mapping = {}
-            new_columns = set(df.columns)
-
-            for key, possible_names in expected_columns.items():
-                for col in df.columns:
-                    if col in possible_names:
-                        column_mapping[key] = col
-                        new_columns.discard(col)  # Remover a coluna mapeada do conjunto de novas colunas
-                        break
-                if key not in column_mapping:
-                    column_mapping[key] = None  # Se não encontrar nenhuma correspondência
+            # Colunas do arquivo que não foram associadas a nenhuma categoria
+            new_columns = set(df.columns) - set(column_mapping.values())
 
             # Inicializar session state para novas colunas
             if 'new_columns_mapping' not in st.session_state:
@@ -284,14 +229,28 @@ def main():
             # Verificar se há colunas novas não mapeadas e pedir ao usuário para classificá-las
             if new_columns:
                 st.write("Novas colunas detectadas:")
+                # Sugestões a partir de uma amostra dos valores de cada coluna (NCM, CEST, EAN, preços...)
+                sugestoes = {s["coluna"]: s for s in sugerir_mapeamentos_em_cache(hash_arquivo, versao, mapping_file, conteudo)}
+                automaticas = [s for s in sugestoes.values() if s["automatica"]]
+                if automaticas and st.button(f"Aplicar {len(automaticas)} Sugestões de Alta Confiança"):
+                    aplicar_sugestoes(automaticas, mapping_file)
+                    st.success("Sugestões aplicadas e mapeamento salvo!")
+                    st.rerun()
+                categorias = ["", "ID", "Produto", "Unidade", "Ncm", "Cest", "Custo", "Margem", "Unitário", "CódigoBarras", "Nenhuma"]
                 for new_col in new_columns:
                     # Exibir uma caixa de seleção para o usuário escolher a que categoria essa coluna pertence
                     if new_col not in st.session_state['new_columns_mapping']:
+                        # A sugestão só é exibida; a categoria é gravada apenas quando o usuário a escolhe
+                        sugestao = sugestoes.get(new_col)
+                        texto_sugestao = f"Sugestão pelo perfil dos valores: {sugestao['campo']} (confiança de {sugestao['confianca']:.0%})" if sugestao else None
                         category = st.selectbox(
                             f"Como você categorizaria a coluna '{new_col}'?",
-                            ["", "ID", "Produto", "Unidade", "Ncm", "Cest", "Custo", "Margem", "Unitário", "CódigoBarras", "Nenhuma"],
-                            key=new_col  # Usa a coluna como chave para manter o estado correto
+                            categorias,
+                            key=new_col,  # Usa a coluna como chave para manter o estado correto
+                            help=texto_sugestao,
                         )
+                        if texto_sugestao:
+                            st.caption(texto_sugestao)
                         if category and category != "Nenhuma":
                             # Armazenar a escolha do usuário no session state
                             st.session_state['new_columns_mapping'][new_col] = category
@@ -310,43 +269,62 @@ def main():
                     st.rerun()
         else:
             condicao = 0
-            df[id_column_name] = df[id_column_name].astype(str).str.replace(',', '', regex=False)
-            # Passo 1: Identificar os índices onde barras_column_name é igual a id_column_name
-            indices_iguais = df.index[df[barras_column_name] == df[id_column_name]].tolist() 
-            # Converter a coluna para string, remover a vírgula e depois converter para int
             # Adicionar uma pergunta para o usuário escolher o tratamento da coluna "ID"
             escolha_id = st.radio(
                 "Como deseja tratar a coluna 'ID'?",
                 ("Manter original", "Substituir por sequência numérica")
             )
-            
+
             # Modificar a coluna 'ID' com base na escolha do usuário
-            if escolha_id == "Substituir por sequência numérica":
-              df[id_column_name] = range(1, len(df) + 1)
-              for idx in indices_iguais:
-                df.at[idx, barras_column_name] = df.at[idx, id_column_name]
-                # Converter a coluna CodigoBarras para string
-                df[barras_column_name] = df[barras_column_name].astype(str)
-
-            column_mapping = {}
-            new_columns = set(df.columns)
-            for key, possible_names in expected_columns.items():
-                for col in df.columns:
-                    if col in possible_names:
-                        column_mapping[key] = col
-                        new_columns.discard(col)  # Remover a coluna mapeada do conjunto de novas colunas
-                        break
-                if key not in column_mapping:
-                    column_mapping[key] = None 
-            
+            substituir_id = escolha_id == "Substituir por sequência numérica"
+            conjunto = conjunto_tratado_em_cache(hash_arquivo, versao, mapping_file, substituir_id, conteudo)
+            df = conjunto.df
+
+            # Revisão opcional de produtos quase duplicados (descrições parecidas) antes da inserção
+            if st.checkbox("Detectar produtos quase duplicados"):
+                limiar = st.slider("Similaridade mínima", 0.5, 1.0, LIMIAR_SIMILARIDADE, 0.05)
+                grupos = detectar_similares_em_cache(hash_arquivo, versao, mapping_file, substituir_id, limiar, conteudo)
+                manter = revisar_quase_duplicados(grupos, limiar)
+                if len(manter) < len(grupos):
+                    df = remover_quase_duplicados(df, grupos, manter)
+                    removidos = conjunto.df.index.difference(df.index)
+                    st.write(f"{len(removidos)} produtos quase duplicados não serão inseridos.")
+
             # Exibir o DataFrame
             df1 = df
-            st.dataframe(df)
+            exibir_previa(df, "previa_tratado")
+            with st.expander("Resumo das colunas"):
+                st.dataframe(resumir_colunas_em_cache(hash_arquivo, versao, mapping_file, substituir_id, conteudo))
             st.markdown("---")    
 
         
     #if df1 is not None:
     if condicao == 0:
+        # Modo de carga: inserir apenas ou atualizar os registros que já existem no banco
+        escolha_modo = st.radio(
+            "Como deseja carregar os dados no SQL?",
+            ("Inserir novos registros", "Inserir ou atualizar existentes (upsert)")
+        )
+        modo = "upsert" if escolha_modo.endswith("(upsert)") else "inserir"
+
+        # Conferência das chaves com o banco antes de qualquer gravação (válida para o arquivo e as escolhas atuais)
+        chave_validacao = (hash_arquivo, versao, substituir_id, modo, len(df1))
+        if st.button("Validar Chaves no SQL"):
+            try:
+                with obter_pool_conexoes().conexao() as conn:
+                    st.session_state['conflitos'] = (chave_validacao, validar_chaves(df1, column_mapping, tuple(NOMES_TABELAS), conn, modo))
+            except Exception as e:
+                st.error(f"Erro ao validar as chaves: {e}")
+        chave_anterior, conflitos = st.session_state.get('conflitos', (None, None))
+        if chave_anterior == chave_validacao:
+            if conflitos.empty:
+                st.success("Nenhum conflito de chave encontrado.")
+            else:
+                st.warning(f"{len(conflitos)} conflitos de chave encontrados: " + ", ".join(
+                    f"{tabela}/{motivo}: {quantidade}" for (tabela, motivo), quantidade in conflitos.groupby(["tabela", "motivo"]).size().items()
+                ))
+                exibir_previa(conflitos, "previa_conflitos")
+
         col1, col2, col3 = st.columns([1.6, 1.6, 1]) 
 
         # Tabela de Produtos
@@ -360,12 +338,12 @@ def main():
             )
 
             if colunas_selecionadas_produtos:
-                novo_df_produtos = df1[colunas_selecionadas_produtos]
-                st.dataframe(novo_df_produtos)
+                novo_df_produtos = projetar_selecao(conjunto, "produtos", colunas_selecionadas_produtos, removidos)
+                exibir_previa(novo_df_produtos, "previa_produtos")
                 st.markdown("---")
                 if st.button("Inserir Produtos no SQL"):
                     mapping = selecionar_colunas(df1, colunas_selecionadas_produtos)
-                    inserir_produtos(novo_df_produtos, mapping, "column_mappings.json")
+                    executar_insercao(inserir_produtos, novo_df_produtos, mapping, "Produtos", modo=modo)
 
         # Tabela de Preços
         with col2:
@@ -378,14 +356,12 @@ def main():
             )
 
             if colunas_selecionadas_precos:
-                novo_df_precos = df1[colunas_selecionadas_precos]
-                mapping = selecionar_colunas(df1, colunas_selecionadas_precos)
-                novo_df_precos1 = resolver_custos_unitario_margem(novo_df_precos, mapping, "column_mappings.json")
-                st.dataframe(novo_df_precos1)
+                novo_df_precos1 = projetar_selecao(conjunto, "precos", colunas_selecionadas_precos, removidos)
+                exibir_previa(novo_df_precos1, "previa_precos", lambda trecho: formatar_precos_para_exibicao(trecho, column_mapping))
                 st.markdown("---")
                 if st.button("Inserir Preços no SQL"):
                     mapping = selecionar_colunas(novo_df_precos1, colunas_selecionadas_precos)
-                    inserir_precos(novo_df_precos1, mapping, "column_mappings.json")
+                    executar_insercao(inserir_precos, novo_df_precos1, mapping, "Preços", modo=modo)
 
         # Tabela de Código de Barras
         with col3:
@@ -398,12 +374,32 @@ def main():
             )
 
             if colunas_selecionadas_cod_barras:
-                novo_df_cod_barras = df1[colunas_selecionadas_cod_barras]
-                st.dataframe(novo_df_cod_barras)
+                novo_df_cod_barras = projetar_selecao(conjunto, "codbarras", colunas_selecionadas_cod_barras, removidos)
+                exibir_previa(novo_df_cod_barras, "previa_cod_barras")
                 st.markdown("---")
                 if st.button("Inserir Código de Barras no SQL"):
                     mapping = selecionar_colunas(df1, colunas_selecionadas_cod_barras)
-                    inserir_codigo_barras(novo_df_cod_barras, mapping, "column_mappings.json")
+                    executar_insercao(inserir_codigo_barras, novo_df_cod_barras, mapping, "Código de Barras", modo=modo)
+
+        # Carga de todas as tabelas: Produtos primeiro, depois Preços e Cód.Barras em paralelo
+        projecoes = {}
+        if colunas_selecionadas_produtos:
+            projecoes["produtos"] = novo_df_produtos
+        if colunas_selecionadas_precos:
+            projecoes["precos"] = novo_df_precos1
+        if colunas_selecionadas_cod_barras:
+            projecoes["codbarras"] = novo_df_cod_barras
+
+        if projecoes and st.button("Carregar Todas as Tabelas no SQL"):
+            telemetria = Telemetria()
+            with st.spinner("Carregando tabelas..."):
+                resultado = carregar_tabelas_concorrente(projecoes, obter_pool_conexoes(), mapping_file, telemetria=telemetria, modo=modo)
+            for tabela, info in resultado.items():
+                if info["status"] == "ok":
+                    st.success(f"{NOMES_TABELAS[tabela]}: {info['linhas']} linhas inseridas com sucesso!")
+                else:
+                    st.error(f"{NOMES_TABELAS[tabela]}: {info['status']} - {info['erro']}")
+            exibir_metricas(telemetria)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import unicodedata
+
+# Serviço de mapeamento de colunas: o column_mappings.json é compilado uma única vez
+# em um índice invertido (apelido normalizado -> coluna canônica), mantido em cache
+# no processo e recompilado apenas quando o arquivo muda (mtime/tamanho).
+
+ARQUIVO_MAPEAMENTO = 'column_mappings.json'
+
+DEFAULT_MAPPINGS = {
+    "ID": ["ID", "Código", "Identificador"],
+    "Produto": ["Produto", "Descrição", "Item"],
+    "Unidade": ["UNIDADE", "Un", "Unidade de Medida", "Unidade"],
+    "Ncm": ["NCM", "ncm", "Ncm"],
+    "Cest": ["CEST", "cest", "Cest"],
+    "Custo": ["Custo", "Preço de Custo", "Valor Custo"],
+    "Margem": ["Margem", "MargemLucro", "Margem de Lucro"],
+    "Unitário": ["Unitário", "Preço Unitário", "Valor Unitário", "Unitario"],
+    "CódigoBarras": ["CodigoBarras", "Código de Barras", "EAN"]
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Função para normalizar o nome de uma coluna (sem acentos, sem diferença de maiúsculas/minúsculas)
+def normalizar_nome(nome):
+    nome = unicodedata.normalize('NFKD', str(nome).strip())
+    return ''.join(c for c in nome if not unicodedata.combining(c)).casefold()
+
+# Função para compilar o índice invertido apelido -> (coluna canônica, prioridade do apelido)
+def compilar_indice(column_mappings):
+    indice = {}
+    for key, possible_names in column_mappings.items():
+        for posicao, name in enumerate(possible_names):
+            indice.setdefault(normalizar_nome(name), (key, posicao))
+    return indice
+
+# Mapeamento compilado: mantém a lista de apelidos original e o índice invertido
+class MapeamentoColunas:
+    def __init__(self, aliases, versao=None):
+        self.aliases = aliases
+        self.versao = versao
+        self.indice = compilar_indice(aliases)
+
+    def __getitem__(self, key):
+        return self.aliases[key]
+
+    def __contains__(self, key):
+        return key in self.aliases
+
+    def keys(self):
+        return self.aliases.keys()
+
+    def items(self):
+        return self.aliases.items()
+
+    # Resolve todas as colunas canônicas em uma única passada pelas colunas do DataFrame.
+    # Quando mais de uma coluna casa com a mesma chave, vale a de apelido com menor prioridade.
+    def resolver(self, colunas):
+        resultado = dict.fromkeys(self.aliases)
+        prioridades = {}
+        for col in colunas:
+            encontrado = self.indice.get(normalizar_nome(col))
+            if encontrado is None:
+                continue
+            key, posicao = encontrado
+            if key not in prioridades or posicao < prioridades[key]:
+                resultado[key] = col
+                prioridades[key] = posicao
+        return resultado
+
+    # Colunas que não correspondem a nenhum apelido conhecido
+    def nao_mapeadas(self, colunas):
+        return [col for col in colunas if normalizar_nome(col) not in self.indice]
+
+# Função para identificar a versão do arquivo de mapeamento (muda a cada gravação)
+def versao_mapeamento(file_name=ARQUIVO_MAPEAMENTO):
+    stat = os.stat(file_name)
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Função para obter o mapeamento compilado, usando o cache enquanto o arquivo não mudar
+def obter_mapeamento(file_name=ARQUIVO_MAPEAMENTO):
+    if not os.path.exists(file_name):
+        verificar_ou_criar_mapeamento_json(file_name)
+    caminho = os.path.abspath(file_name)
+    versao = versao_mapeamento(caminho)
+    with _cache_lock:
+        compilado = _cache.get(caminho)
+        if compilado is None or compilado.versao != versao:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                compilado = MapeamentoColunas(json.load(f), versao)
+            _cache[caminho] = compilado
+    return compilado
+
+# Função para descartar o mapeamento compilado em cache
+def invalidar_cache(file_name=None):
+    with _cache_lock:
+        if file_name is None:
+            _cache.clear()
+        else:
+            _cache.pop(os.path.abspath(file_name), None)
+
+# Função para verificar ou criar o mapeamento JSON de colunas (só grava se algo mudou)
+def verificar_ou_criar_mapeamento_json(file_name=ARQUIVO_MAPEAMENTO):
+    if not os.path.exists(file_name):
+        save_mapping(DEFAULT_MAPPINGS, file_name)
+        return file_name
+
+    with open(file_name, 'r', encoding='utf-8') as f:
+        existing_mappings = json.load(f)
+
+    alterado = False
+    for key, possible_names in DEFAULT_MAPPINGS.items():
+        if key in existing_mappings:
+            for new_name in possible_names:
+                if new_name not in existing_mappings[key]:
+                    existing_mappings[key].append(new_name)
+                    alterado = True
+    if alterado:
+        save_mapping(existing_mappings, file_name)
+    return file_name
+
+# Função para carregar mapeamento de colunas (cópia editável do mapeamento em cache)
+def load_mapping(file_name=ARQUIVO_MAPEAMENTO):
+    return {key: list(possible_names) for key, possible_names in obter_mapeamento(file_name).items()}
+
+# Função para salvar o mapeamento atualizado
+def save_mapping(updated_mapping, file_name=ARQUIVO_MAPEAMENTO):
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(updated_mapping, f, indent=4)
+    invalidar_cache(file_name)
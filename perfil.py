@@ -0,0 +1,219 @@
+from itertools import permutations
+
+import numpy as np
+import pandas as pd
+
+from leitura import converter_dinheiro, ler_cabecalho
+from mapeamento import ARQUIVO_MAPEAMENTO, load_mapping, normalizar_nome, obter_mapeamento, save_mapping
+
+# Perfil das colunas desconhecidas: uma amostra limitada de cada coluna (nunca o arquivo inteiro)
+# é comparada com os campos canônicos pelo formato dos valores (NCM de 8 dígitos, CEST de 7,
+# dígito verificador do EAN, unidades curtas, descrições, distribuição numérica dos preços).
+# As sugestões de alta confiança podem ser gravadas direto no column_mappings.json.
+
+# Quantidade máxima de linhas analisadas por arquivo
+TAMANHO_AMOSTRA = 1000
+
+# Mínimo de valores preenchidos na amostra para confiar no perfil da coluna
+MINIMO_VALORES = 5
+
+# Confiança mínima para sugerir um campo e para aplicá-lo sem confirmação
+LIMIAR_SUGESTAO = 0.6
+LIMIAR_AUTOMATICO = 0.9
+
+# Quantidade máxima de colunas de preço sem dica no nome comparadas entre si
+MAXIMO_CANDIDATAS_PRECO = 6
+
+# Unidades de medida comerciais mais comuns
+UNIDADES_CONHECIDAS = {
+    "UN", "UND", "UNID", "KG", "G", "MG", "CX", "PC", "PCT", "LT", "L", "ML", "MT", "M", "M2", "M3",
+    "CM", "MM", "RL", "DZ", "FD", "SC", "PAR", "JG", "KIT", "GL", "TB", "BD", "FR", "CJ", "BL", "TON",
+}
+
+# Trechos do nome da coluna que desempatam campos com o mesmo formato de valor
+DICAS_NOME = {
+    "ID": ("cod", "id", "ref", "sku"),
+    "Custo": ("cust", "compra"),
+    "Margem": ("marg", "lucro", "markup", "%"),
+    "Unitário": ("unit", "venda", "preco", "valor", "pv"),
+}
+
+# Função para obter uma amostra de até `tamanho` linhas espalhadas pelo DataFrame (custo fixo)
+def amostrar(df, tamanho=TAMANHO_AMOSTRA):
+    if len(df) <= tamanho:
+        return df
+    return df.iloc[np.linspace(0, len(df) - 1, tamanho).astype(np.int64)]
+
+# Função para ler apenas as primeiras linhas do CSV, todas como texto
+def amostrar_csv(caminho, tamanho=TAMANHO_AMOSTRA):
+    df = pd.read_csv(caminho, nrows=tamanho, dtype=str)
+    if hasattr(caminho, 'seek'):
+        caminho.seek(0)
+    return df
+
+# Função para obter os valores preenchidos da coluna como texto (códigos exportados como float perdem o ".0")
+def _textos(serie):
+    texto = serie.dropna().astype(str).str.strip().str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+    return texto[texto != '']
+
+# Função para conferir o dígito verificador de códigos GTIN/EAN (8, 12, 13 ou 14 dígitos)
+def ean_valido(texto):
+    validos = np.zeros(len(texto), dtype=bool)
+    candidatos = texto.str.fullmatch(r'\d{8}|\d{12,14}').to_numpy()
+    if not candidatos.any():
+        return validos
+    codigos = texto[candidatos].str.zfill(14)
+    digitos = np.frombuffer(''.join(codigos).encode('ascii'), dtype=np.uint8).reshape(-1, 14) - ord('0')
+    # Pesos 3 e 1 alternados da direita para a esquerda, sem contar o dígito verificador
+    pesos = np.tile([3, 1], 7)[:13]
+    verificador = (10 - (digitos[:, :13].astype(np.int64) @ pesos) % 10) % 10
+    validos[candidatos] = verificador == digitos[:, 13]
+    return validos
+
+# Função para verificar se o nome da coluna contém alguma dica do campo
+def _tem_dica(nome, key):
+    nome = normalizar_nome(nome)
+    return any(dica in nome for dica in DICAS_NOME.get(key, ()))
+
+# Função para obter o campo de preço indicado pelo nome da coluna; custo e margem são dicas mais
+# específicas que unitário (ex.: "Preço de Custo")
+def _dica_preco(nome):
+    return next((key for key in ("Custo", "Margem", "Unitário") if _tem_dica(nome, key)), None)
+
+# Função para pontuar uma coluna contra cada campo canônico (0 a 1, proporção da amostra que casa)
+def perfilar_coluna(serie, nome=None):
+    texto = _textos(serie)
+    pontuacao = {}
+    if len(texto) < MINIMO_VALORES:
+        return pontuacao
+    nome = serie.name if nome is None else nome
+
+    # Códigos fiscais, com ou sem a pontuação oficial (8471.30.12, 01.001.00)
+    pontuacao["Ncm"] = texto.str.fullmatch(r'\d{8}|\d{4}\.\d{2}\.\d{2}').mean()
+    pontuacao["Cest"] = texto.str.fullmatch(r'\d{7}|\d{2}\.\d{3}\.\d{2}').mean()
+    pontuacao["CódigoBarras"] = ean_valido(texto).mean()
+
+    maiusculas = texto.str.upper()
+    pontuacao["Unidade"] = maiusculas.isin(UNIDADES_CONHECIDAS).mean()
+
+    # Descrições: texto livre com letras e espaços, quase sem repetição
+    livre = texto.str.contains(r'[A-Za-zÀ-ÿ]', regex=True) & texto.str.contains(' ', regex=False) & (texto.str.len() >= 8)
+    pontuacao["Produto"] = livre.mean() * min(1.0, texto.nunique() / len(texto) / 0.8)
+
+    # IDs: inteiros curtos e sem repetição; o nome da coluna reforça a confiança
+    inteiros = texto.str.fullmatch(r'\d{1,10}')
+    unicos = texto.nunique() / len(texto)
+    pontuacao["ID"] = inteiros.mean() * unicos * (0.95 if _tem_dica(nome, "ID") else 0.7)
+
+    # Valores numéricos não negativos (aceita vírgula decimal); números com formato de código
+    # fiscal ou de barras são códigos, não preços
+    numeros = converter_dinheiro(texto.astype(object)).dropna()
+    if len(numeros):
+        numericos = len(numeros) / len(texto) * (numeros >= 0).mean()
+        numericos *= 1 - max(pontuacao["Ncm"], pontuacao["Cest"], pontuacao["CódigoBarras"])
+        decimais = (numeros % 1 != 0).mean()
+        dica = _dica_preco(nome)
+        for key in ("Custo", "Unitário", "Margem"):
+            # Margens costumam ficar entre 0 e 1000%
+            plausivel = numeros.between(0, 1000).mean() if key == "Margem" else 1.0
+            # Sem dica no nome, custo e unitário ficam empatados abaixo do limiar automático
+            confianca = 0.95 if dica == key else (0.6 + 0.1 * decimais) * (0.9 if key == "Margem" else 1.0)
+            pontuacao[key] = numericos * plausivel * confianca
+
+    return {key: float(valor) for key, valor in pontuacao.items() if valor > 0}
+
+# Função para desempatar as colunas de preço sem dica no nome (custo e unitário empatados):
+# três colunas em que unitário = custo * (1 + margem/100) na maior parte da amostra são custo, margem
+# e unitário; sem isso, um único par em que uma coluna fica abaixo da outra em quase todas as linhas
+# indica custo e unitário
+def _desempatar_precos(amostra, perfis):
+    candidatas = [col for col, perfil in perfis.items()
+                  if perfil.get("Custo", 0) >= LIMIAR_SUGESTAO and perfil["Custo"] == perfil.get("Unitário") == max(perfil.values())]
+    if len(candidatas) < 2 or len(candidatas) > MAXIMO_CANDIDATAS_PRECO:
+        return
+    valores = {col: converter_dinheiro(_textos(amostra[col]).astype(object)).reindex(amostra.index).to_numpy() for col in candidatas}
+
+    melhor, proporcao = None, 0.5
+    for custo, margem, unitario in permutations(candidatas, 3):
+        c, m, u = valores[custo], valores[margem], valores[unitario]
+        validas = ~np.isnan(c) & ~np.isnan(m) & ~np.isnan(u) & (c > 0)
+        if validas.sum() < MINIMO_VALORES:
+            continue
+        with np.errstate(divide='ignore', invalid='ignore'):
+            coerentes = np.abs((u[validas] - c[validas]) / c[validas] * 100 - m[validas]) <= 0.01
+        if coerentes.mean() > proporcao:
+            melhor, proporcao = {"Custo": custo, "Margem": margem, "Unitário": unitario}, coerentes.mean()
+
+    if melhor is None:
+        pares = []
+        for custo, unitario in permutations(candidatas, 2):
+            c, u = valores[custo], valores[unitario]
+            comparaveis = ~np.isnan(c) & ~np.isnan(u) & (c != u)
+            if comparaveis.sum() >= MINIMO_VALORES and (c[comparaveis] < u[comparaveis]).mean() >= 0.95:
+                pares.append({"Custo": custo, "Unitário": unitario})
+        if len(pares) != 1:
+            return
+        melhor = pares[0]
+
+    for key, col in melhor.items():
+        for outro in ("Custo", "Unitário", "Margem"):
+            perfis[col][outro] = LIMIAR_AUTOMATICO if outro == key else 0.0
+
+# Função para sugerir um campo para cada coluna desconhecida (cada campo é usado uma única vez,
+# priorizando as combinações de maior confiança)
+def sugerir_mapeamentos(amostra, colunas, campos):
+    perfis = {col: perfilar_coluna(amostra[col]) for col in colunas}
+    _desempatar_precos(amostra, perfis)
+
+    pares = sorted(
+        ((confianca, col, key) for col, perfil in perfis.items() for key, confianca in perfil.items() if key in campos),
+        key=lambda par: par[0], reverse=True,
+    )
+    sugestoes = []
+    usadas, preenchidos = set(), set()
+    for confianca, col, key in pares:
+        if confianca < LIMIAR_SUGESTAO:
+            break
+        if col in usadas or key in preenchidos:
+            continue
+        usadas.add(col)
+        preenchidos.add(key)
+        alternativas = sorted(((c, k) for k, c in perfis[col].items() if k != key and c >= LIMIAR_SUGESTAO), reverse=True)
+        sugestoes.append({
+            "coluna": col,
+            "campo": key,
+            "confianca": round(confianca, 3),
+            "automatica": confianca >= LIMIAR_AUTOMATICO,
+            "alternativas": [k for _, k in alternativas],
+        })
+    return sugestoes
+
+# Função para perfilar um DataFrame já lido: só as colunas fora do mapeamento e só os campos que faltam
+def perfilar_dataframe(df, column_mappings_file=ARQUIVO_MAPEAMENTO, tamanho=TAMANHO_AMOSTRA):
+    mapeamento = obter_mapeamento(column_mappings_file)
+    colunas = mapeamento.resolver(df.columns)
+    campos = [key for key, col in colunas.items() if col is None]
+    desconhecidas = mapeamento.nao_mapeadas(df.columns)
+    if not campos or not desconhecidas:
+        return []
+    return sugerir_mapeamentos(amostrar(df, tamanho), desconhecidas, campos)
+
+# Função para perfilar um arquivo CSV lendo apenas o cabeçalho e a amostra
+def perfilar_arquivo(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, tamanho=TAMANHO_AMOSTRA):
+    mapeamento = obter_mapeamento(column_mappings_file)
+    cabecalho = ler_cabecalho(caminho)
+    if all(mapeamento.resolver(cabecalho).values()) or not mapeamento.nao_mapeadas(cabecalho):
+        return []
+    return perfilar_dataframe(amostrar_csv(caminho, tamanho), column_mappings_file, tamanho)
+
+# Função para gravar no column_mappings.json as sugestões escolhidas (por padrão, só as automáticas)
+def aplicar_sugestoes(sugestoes, column_mappings_file=ARQUIVO_MAPEAMENTO, somente_automaticas=True):
+    aplicadas = [s for s in sugestoes if s["automatica"] or not somente_automaticas]
+    if not aplicadas:
+        return []
+    mapeamento = load_mapping(column_mappings_file)
+    for sugestao in aplicadas:
+        if sugestao["coluna"] not in mapeamento[sugestao["campo"]]:
+            mapeamento[sugestao["campo"]].append(sugestao["coluna"])
+    save_mapping(mapeamento, column_mappings_file)
+    return aplicadas
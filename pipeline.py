@@ -0,0 +1,525 @@
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from telemetria import medir
+from leitura import ler_csv_tipado, ler_csv_tipado_em_blocos
+from precos import ESCALA_PRECO, ESCALA_MARGEM, para_decimal, resolver_precos
+from mapeamento import (
+    ARQUIVO_MAPEAMENTO,
+    MapeamentoColunas,
+    load_mapping,
+    obter_mapeamento,
+    save_mapping,
+    verificar_ou_criar_mapeamento_json,
+)
+from regras import obter_regras
+
+# Módulo com a lógica do processo ETL (mapeamento, tratamento e inserção),
+# sem dependência do Streamlit. O pyodbc só é importado ao abrir uma conexão.
+
+# Configuração de conexão com o banco de dados
+DADOS_CONEXAO = (
+    "Driver={SQL Server};"
+    "Server=DUXPC;"
+    "Database=Conversao;"
+    "Trusted_Connection=yes;"
+)
+
+# Tamanho padrão dos lotes enviados ao banco e intervalo de commits (em linhas)
+TAMANHO_LOTE = 1000
+COMMIT_A_CADA = 50000
+
+# Quantidade de linhas lidas do CSV por bloco no modo de leitura em blocos
+TAMANHO_BLOCO_LEITURA = 100000
+
+# Colunas canônicas que precisam estar mapeadas para o tratamento dos dados
+COLUNAS_OBRIGATORIAS = ["ID", "Produto", "Unidade", "Ncm", "Cest", "CódigoBarras"]
+
+# Função para gerar lista de colunas válidas
+def get_valid_columns(*cols):
+    return [col for col in cols if col is not None]
+
+# Função para obter o mapeamento compilado a partir de um dicionário ou de um mapeamento já compilado
+def compilar_mapeamento(column_mappings):
+    if isinstance(column_mappings, MapeamentoColunas):
+        return column_mappings
+    return MapeamentoColunas(column_mappings)
+
+# Função para mapear cada coluna canônica para a coluna real do DataFrame (ou None)
+def mapear_colunas(df, column_mappings):
+    return compilar_mapeamento(column_mappings).resolver(df.columns)
+
+# Função para listar as colunas obrigatórias que não foram encontradas
+def colunas_faltantes(colunas):
+    return [key for key in COLUNAS_OBRIGATORIAS if colunas.get(key) is None]
+
+# Conjunto compacto (array ordenado de hashes de 64 bits) das chaves já vistas em blocos anteriores
+class ChavesVistas:
+    def __init__(self):
+        self.hashes = np.empty(0, dtype=np.uint64)
+
+    def __len__(self):
+        return len(self.hashes)
+
+    # Retorna a máscara das linhas cuja chave ainda não apareceu (nem neste bloco, nem nos anteriores)
+    def filtrar_novas(self, serie):
+        hashes = pd.util.hash_pandas_object(serie, index=False).to_numpy()
+        mascara = ~pd.Series(hashes).duplicated().to_numpy()
+        if len(self.hashes):
+            mascara &= ~np.isin(hashes, self.hashes, assume_unique=False)
+        self.hashes = np.union1d(self.hashes, hashes[mascara])
+        return mascara
+
+# Função para aplicar os tratamentos de limpeza no DataFrame
+def limpar_dados(df, colunas, vistos=None, telemetria=None, regras=None):
+    Produto_column_name = colunas.get("Produto")
+
+    if Produto_column_name is not None:
+        with medir(telemetria, "deduplicacao", len(df)):
+            # Remover linhas onde a coluna 'Produto' tem valores nulos
+            df = df.dropna(subset=[Produto_column_name])
+            # Remover linhas duplicadas com base no mapeamento PRODUTO (também entre blocos, quando houver)
+            if vistos is None:
+                df = df.drop_duplicates(Produto_column_name)
+            else:
+                df = df[vistos.filtrar_novas(df[Produto_column_name])]
+
+    with medir(telemetria, "normalizacao", len(df)):
+        df = normalizar_colunas(df, colunas, regras)
+
+    return df
+
+# Função para normalizar as colunas conforme as regras de limpeza declaradas (cleaning_rules.json)
+def normalizar_colunas(df, colunas, regras=None):
+    if regras is None:
+        regras = obter_regras()
+    return regras.aplicar(df, colunas)
+
+# Função para tratar a coluna ID (remoção da vírgula e, opcionalmente, sequência numérica)
+def tratar_id(df, colunas, substituir_id=False, inicio_id=1):
+    id_column_name = colunas["ID"]
+    barras_column_name = colunas["CódigoBarras"]
+
+    df[id_column_name] = df[id_column_name].astype(str).str.replace(',', '', regex=False)
+
+    if substituir_id:
+        # Códigos de barras iguais ao ID antigo acompanham o novo ID
+        iguais = (df[barras_column_name] == df[id_column_name]).to_numpy()
+        df[id_column_name] = range(inicio_id, inicio_id + len(df))
+        if iguais.any():
+            df[barras_column_name] = df[barras_column_name].where(~iguais, df[id_column_name]).astype(str)
+
+    return df
+
+# Função para executar todo o tratamento de um DataFrame lido do CSV
+def preparar_dados(df, column_mappings, substituir_id=False, vistos=None, inicio_id=1, telemetria=None, regras=None):
+    colunas = mapear_colunas(df, column_mappings)
+
+    faltantes = colunas_faltantes(colunas)
+    if faltantes:
+        raise KeyError(f"Colunas não encontradas no DataFrame: {', '.join(faltantes)}. Verifique os mapeamentos.")
+
+    df = limpar_dados(df, colunas, vistos, telemetria, regras)
+    with medir(telemetria, "tratamento_id", len(df)):
+        df = tratar_id(df, colunas, substituir_id, inicio_id)
+    return df, colunas
+
+# Função para ler o CSV em blocos, aplicando o mesmo tratamento em cada bloco (memória limitada)
+def ler_csv_em_blocos(caminho, column_mappings, substituir_id=False, tamanho_bloco=TAMANHO_BLOCO_LEITURA, telemetria=None):
+    vistos = ChavesVistas()
+    proximo_id = 1
+    # Todos os blocos são lidos com os mesmos tipos (um bloco só com números não vira float
+    # e o código de barras não ganha o sufixo ".0")
+    leitor = ler_csv_tipado_em_blocos(caminho, compilar_mapeamento(column_mappings), tamanho_bloco)
+    while True:
+        with medir(telemetria, "leitura") as etapa:
+            bloco = next(leitor, None)
+            etapa["linhas"] = len(bloco) if bloco is not None else 0
+        if bloco is None:
+            break
+        bloco, colunas = preparar_dados(bloco, column_mappings, substituir_id, vistos, proximo_id, telemetria)
+        proximo_id += len(bloco)
+        if len(bloco):
+            yield bloco, colunas
+
+# Função para manipular custos, unitários e margens
+def resolver_custos_unitario_margem(df, mapping, column_mappings_file=ARQUIVO_MAPEAMENTO):
+    colunas = obter_mapeamento(column_mappings_file).resolver(df.columns)
+
+    custo_col = colunas["Custo"]
+    unitario_col = colunas["Unitário"]
+    margem_col = colunas["Margem"]
+
+    if not custo_col or not unitario_col or not margem_col:
+        raise KeyError("Coluna não encontrada no DataFrame. Verifique os mapeamentos.")
+
+    # O resultado reaproveita os arrays das demais colunas (sem cópia); só as colunas de preço são novas
+    return montar_quadro(df, {**{col: df[col] for col in df.columns}, **derivar_precos(df, custo_col, unitario_col, margem_col)})
+
+# Função para calcular as colunas de preço resolvidas em arrays próprios (ponto fixo, com 4 casas decimais
+# como no DECIMAL(18, 4) do banco) e os indicadores de ajuste
+def derivar_precos(df, custo_col, unitario_col, margem_col):
+    precos = resolver_precos(df[custo_col].to_numpy(dtype=float), df[unitario_col].to_numpy(dtype=float), df[margem_col].to_numpy(dtype=float))
+    return {
+        custo_col: para_decimal(precos["custo"], precos["precos_validos"], ESCALA_PRECO),
+        unitario_col: para_decimal(precos["unitario"], precos["precos_validos"], ESCALA_PRECO),
+        margem_col: para_decimal(precos["margem"], precos["margem_valida"], ESCALA_MARGEM),
+        'Custo_Alterado': precos["custo_alterado"],
+        'Unitario_Alterado': precos["unitario_alterado"],
+        'Margem_Incorreta': precos["margem_incorreta"],
+        'Custo_Zero': precos["custo_zero"],
+    }
+
+# Função para obter uma visão somente leitura dos valores de uma coluna (sem cópia)
+def somente_leitura(valores):
+    if isinstance(valores, pd.Series):
+        valores = valores.to_numpy() if isinstance(valores.dtype, np.dtype) else valores.array
+    if isinstance(valores, pd.Categorical):
+        return pd.Categorical.from_codes(somente_leitura(valores.codes), dtype=valores.dtype, validate=False)
+    if isinstance(valores, pd.api.extensions.ExtensionArray):
+        # Demais tipos de extensão (ex.: Int64) são repassados como estão
+        return valores
+    visao = np.asarray(valores).view()
+    visao.flags.writeable = False
+    return visao
+
+# Função para montar um DataFrame com o mesmo índice sobre arrays já existentes, sem copiá-los
+def montar_quadro(df, dados):
+    return pd.DataFrame({nome: somente_leitura(valores) for nome, valores in dados.items()}, index=df.index, copy=False)
+
+# Função para abrir a conexão com o banco de dados (pyodbc importado apenas aqui)
+def conectar(dados_conexao=DADOS_CONEXAO):
+    import pyodbc
+    return pyodbc.connect(dados_conexao)
+
+# Função para montar as tuplas de parâmetros diretamente a partir dos arrays das colunas
+def gerar_parametros(df, colunas_mapeadas):
+    # Valores nulos (NaN) viram None para serem gravados como NULL
+    arrays = [df[col].to_numpy(dtype=object, na_value=None) for col in colunas_mapeadas]
+    return list(zip(*arrays))
+
+# Função para gerar os lotes de parâmetros sob demanda: só as tuplas do lote atual ficam em memória
+def gerar_lotes(df, colunas_mapeadas, tamanho_lote):
+    for inicio in range(0, len(df), tamanho_lote):
+        yield inicio, gerar_parametros(df.iloc[inicio:inicio + tamanho_lote], colunas_mapeadas)
+
+# Linhas recusadas pelo banco na carga tolerante a falhas, com o erro devolvido pelo banco
+class Quarentena:
+    def __init__(self):
+        self.registros = []
+        self._lock = threading.Lock()
+
+    def registrar(self, tabela, linha, colunas, valores, erro):
+        with self._lock:
+            self.registros.append({
+                "tabela": tabela,
+                "linha": linha,
+                "valores": dict(zip(colunas, valores)),
+                "erro": str(erro),
+            })
+
+    def __len__(self):
+        return len(self.registros)
+
+    def para_dataframe(self):
+        df = pd.DataFrame(self.registros, columns=["tabela", "linha", "valores", "erro"])
+        df["valores"] = df["valores"].map(lambda valores: json.dumps(valores, ensure_ascii=False, default=str))
+        return df
+
+    # Grava (ou acrescenta a) um arquivo CSV de quarentena
+    def salvar(self, caminho):
+        self.para_dataframe().to_csv(caminho, mode='a', index=False, header=not os.path.exists(caminho))
+        return caminho
+
+# Função para inserção genérica de dados no banco de dados (em lotes, via executemany).
+# Com uma quarentena, os lotes que falham são divididos até isolar as linhas recusadas.
+def inserir_dados(df, colunas_mapeadas, tabela, comando_sql, conexao=None, tamanho_lote=TAMANHO_LOTE, commit_a_cada=COMMIT_A_CADA, progresso=None, telemetria=None, quarentena=None):
+    with medir(telemetria, f"insercao:{tabela}", len(df)):
+        if progresso is None and telemetria is not None:
+            progresso = telemetria.canal_progresso(f"insercao:{tabela}")
+        if quarentena is not None:
+            return _inserir_com_quarentena(df, colunas_mapeadas, tabela, comando_sql, conexao, tamanho_lote, progresso, quarentena)
+        return _inserir_em_lotes(df, colunas_mapeadas, comando_sql, conexao, tamanho_lote, commit_a_cada, progresso)
+
+# Função que insere os lotes isolando as linhas com erro por bisseção: cada lote (ou metade) que
+# funciona é confirmado; um lote que falha é desfeito e dividido ao meio, até chegar a linhas
+# individuais, que vão para a quarentena. São O(k log n) comandos extras para k linhas com erro.
+def _inserir_com_quarentena(df, colunas_mapeadas, tabela, comando_sql, conexao, tamanho_lote, progresso, quarentena):
+    conn = conexao if conexao is not None else conectar()
+    cursor = conn.cursor()
+    if hasattr(cursor, 'fast_executemany'):
+        cursor.fast_executemany = True
+    total_rows = len(df)
+    linhas = df.index
+    inseridas = 0
+
+    # inicio/fim são posições dentro do lote; deslocamento é a posição do lote no DataFrame
+    def tentar(parametros, deslocamento, inicio, fim):
+        try:
+            cursor.executemany(comando_sql, parametros[inicio:fim])
+            conn.commit()
+            return fim - inicio
+        except Exception as e:
+            conn.rollback()
+            if fim - inicio == 1:
+                quarentena.registrar(tabela, linhas[deslocamento + inicio], colunas_mapeadas, parametros[inicio], e)
+                return 0
+            meio = (inicio + fim) // 2
+            return tentar(parametros, deslocamento, inicio, meio) + tentar(parametros, deslocamento, meio, fim)
+
+    try:
+        for deslocamento, lote in gerar_lotes(df, colunas_mapeadas, tamanho_lote):
+            inseridas += tentar(lote, deslocamento, 0, len(lote))
+            if progresso is not None:
+                progresso((deslocamento + len(lote)) / total_rows)
+        if progresso is not None and total_rows == 0:
+            progresso(1.0)
+        return inseridas
+
+    finally:
+        cursor.close()
+        if conexao is None:
+            conn.close()
+
+# Função que envia os lotes de parâmetros ao banco (executemany) e controla os commits
+def _inserir_em_lotes(df, colunas_mapeadas, comando_sql, conexao, tamanho_lote, commit_a_cada, progresso):
+    conn = conexao if conexao is not None else conectar()
+    cursor = conn.cursor()
+    # fast_executemany existe apenas no cursor do pyodbc; outras conexões DB-API (ex.: sqlite3) ignoram
+    if hasattr(cursor, 'fast_executemany'):
+        cursor.fast_executemany = True
+    total_rows = len(df)
+    pendentes = 0
+
+    try:
+        for inicio, lote in gerar_lotes(df, colunas_mapeadas, tamanho_lote):
+            cursor.executemany(comando_sql, lote)
+            pendentes += len(lote)
+
+            # commit_a_cada=None mantém a tabela inteira em uma única transação
+            if commit_a_cada and pendentes >= commit_a_cada:
+                conn.commit()
+                pendentes = 0
+
+            if progresso is not None:
+                progresso(min((inicio + len(lote)) / total_rows, 1.0))
+
+        conn.commit()
+        if progresso is not None and total_rows == 0:
+            progresso(1.0)
+        return total_rows
+
+    except Exception:
+        conn.rollback()
+        raise
+
+    finally:
+        cursor.close()
+        if conexao is None:
+            conn.close()
+
+# Estrutura das tabelas de destino (tipos conforme testes/Cods.txt), usada nas tabelas de staging do upsert
+ESTRUTURA_TABELAS = {
+    "Produtos": [("ID_Prod", "INT"), ("Descricao", "VARCHAR(100)"), ("UN", "VARCHAR(10)"), ("NCM", "VARCHAR(10)"), ("CEST", "VARCHAR(20)")],
+    "ProdPreco": [("ID_Prod", "INT"), ("PrecoCusto", "DECIMAL(18, 4)"), ("MargemLucro", "DECIMAL(18, 4)"), ("PrecoUnitario", "DECIMAL(18, 4)")],
+    "CodBarras": [("ID_Prod", "INT"), ("Cod_Barras", "VARCHAR(50)")],
+}
+
+# Coluna usada para casar as linhas da staging com as linhas existentes no destino
+CHAVE_UPSERT = "ID_Prod"
+
+# Função para identificar se a conexão é SQLite (testes locais) ou SQL Server
+def eh_sqlite(conn):
+    return type(conn).__module__.startswith("sqlite3")
+
+# Função para montar os comandos do upsert de uma tabela: limpar/criar staging, inserir na staging,
+# aplicar no destino (set-based) e remover a staging
+def comandos_upsert(tabela_sql, sqlite=False):
+    estrutura = ESTRUTURA_TABELAS[tabela_sql]
+    colunas = [nome for nome, _ in estrutura]
+    atualizadas = [nome for nome in colunas if nome != CHAVE_UPSERT]
+    lista_colunas = ", ".join(colunas)
+    definicao = ", ".join(f"{nome} {tipo}" for nome, tipo in estrutura)
+
+    if sqlite:
+        staging = f"stg_{tabela_sql}"
+        preparar = [f"DROP TABLE IF EXISTS temp.{staging}", f"CREATE TEMP TABLE {staging} ({definicao})"]
+        aplicar = [
+            f"UPDATE {tabela_sql} SET {', '.join(f'{nome} = origem.{nome}' for nome in atualizadas)} "
+            f"FROM {staging} AS origem WHERE {tabela_sql}.{CHAVE_UPSERT} = origem.{CHAVE_UPSERT}",
+            f"INSERT INTO {tabela_sql} ({lista_colunas}) SELECT {lista_colunas} FROM {staging} AS origem "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {tabela_sql} AS destino WHERE destino.{CHAVE_UPSERT} = origem.{CHAVE_UPSERT})",
+        ]
+    else:
+        staging = f"#stg_{tabela_sql}"
+        preparar = [
+            f"IF OBJECT_ID('tempdb..{staging}') IS NOT NULL DROP TABLE {staging}",
+            f"CREATE TABLE {staging} ({definicao})",
+        ]
+        aplicar = [
+            f"MERGE {tabela_sql} WITH (HOLDLOCK) AS destino "
+            f"USING {staging} AS origem ON destino.{CHAVE_UPSERT} = origem.{CHAVE_UPSERT} "
+            f"WHEN MATCHED THEN UPDATE SET {', '.join(f'destino.{nome} = origem.{nome}' for nome in atualizadas)} "
+            f"WHEN NOT MATCHED BY TARGET THEN INSERT ({lista_colunas}) "
+            f"VALUES ({', '.join(f'origem.{nome}' for nome in colunas)});"
+        ]
+
+    inserir = f"INSERT INTO {staging} ({lista_colunas}) VALUES ({', '.join('?' for _ in colunas)})"
+    remover = f"DROP TABLE {staging}"
+    return preparar, inserir, aplicar, remover
+
+# Função para upsert de dados: carga em lotes na staging e um único comando set-based por tabela
+def upsert_dados(df, colunas_mapeadas, tabela, tabela_sql, conexao=None, tamanho_lote=TAMANHO_LOTE, progresso=None, telemetria=None):
+    with medir(telemetria, f"upsert:{tabela}", len(df)):
+        if progresso is None and telemetria is not None:
+            progresso = telemetria.canal_progresso(f"upsert:{tabela}")
+
+        # O MERGE não aceita duas linhas de origem para a mesma chave: vale a última do arquivo
+        df = df.drop_duplicates(colunas_mapeadas[0], keep='last')
+
+        conn = conexao if conexao is not None else conectar()
+        preparar, comando_staging, aplicar, remover = comandos_upsert(tabela_sql, eh_sqlite(conn))
+        cursor = conn.cursor()
+        if hasattr(cursor, 'fast_executemany'):
+            cursor.fast_executemany = True
+        total_rows = len(df)
+
+        try:
+            for comando in preparar:
+                cursor.execute(comando)
+            for inicio, lote in gerar_lotes(df, colunas_mapeadas, tamanho_lote):
+                cursor.executemany(comando_staging, lote)
+                if progresso is not None:
+                    progresso(min((inicio + len(lote)) / total_rows, 1.0))
+            for comando in aplicar:
+                cursor.execute(comando)
+            cursor.execute(remover)
+            conn.commit()
+            return total_rows
+
+        except Exception:
+            conn.rollback()
+            raise
+
+        finally:
+            cursor.close()
+            if conexao is None:
+                conn.close()
+
+# Funções específicas de inserção
+def inserir_produtos(df, mapping, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tamanho_lote=TAMANHO_LOTE, progresso=None, commit_a_cada=COMMIT_A_CADA, telemetria=None, modo="inserir", quarentena=None):
+    colunas_df = obter_mapeamento(column_mappings_file).resolver(df.columns)
+    colunas = [colunas_df[key] for key in ["ID", "Produto", "Unidade", "Ncm", "Cest"]]
+    comando_sql = """INSERT INTO Produtos (ID_Prod, Descricao, UN, NCM, CEST) VALUES (?, ?, ?, ?, ?)"""
+    if modo == "upsert":
+        return upsert_dados(df, colunas, 'Produtos', 'Produtos', conexao, tamanho_lote, progresso, telemetria)
+    return inserir_dados(df, colunas, 'Produtos', comando_sql, conexao, tamanho_lote, commit_a_cada, progresso, telemetria, quarentena)
+
+def inserir_precos(df, mapping, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tamanho_lote=TAMANHO_LOTE, progresso=None, commit_a_cada=COMMIT_A_CADA, telemetria=None, modo="inserir", quarentena=None):
+    # Custo, margem e unitário já chegam numéricos de resolver_custos_unitario_margem
+    colunas_df = obter_mapeamento(column_mappings_file).resolver(df.columns)
+    colunas = [colunas_df[key] for key in ["ID", "Custo", "Margem", "Unitário"]]
+
+    comando_sql = """INSERT INTO ProdPreco (ID_Prod, PrecoCusto, MargemLucro, PrecoUnitario) VALUES (?, ?, ?, ?)"""
+
+    if modo == "upsert":
+        return upsert_dados(df, colunas, 'Preços', 'ProdPreco', conexao, tamanho_lote, progresso, telemetria)
+    return inserir_dados(df, colunas, 'Preços', comando_sql, conexao, tamanho_lote, commit_a_cada, progresso, telemetria, quarentena)
+
+def inserir_codigo_barras(df, mapping, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tamanho_lote=TAMANHO_LOTE, progresso=None, commit_a_cada=COMMIT_A_CADA, telemetria=None, modo="inserir", quarentena=None):
+    colunas_df = obter_mapeamento(column_mappings_file).resolver(df.columns)
+    colunas = [colunas_df[key] for key in ["ID", "CódigoBarras"]]
+    comando_sql = """INSERT INTO CodBarras (ID_Prod, Cod_Barras) VALUES (?, ?)"""
+
+    # Converter apenas a coluna CódigoBarras para string (em um array novo: a projeção é somente leitura)
+    if not pd.api.types.is_object_dtype(df[colunas_df["CódigoBarras"]]):
+        df = montar_quadro(df, {**{col: df[col] for col in df.columns}, colunas_df["CódigoBarras"]: df[colunas_df["CódigoBarras"]].astype(str)})
+
+    if modo == "upsert":
+        return upsert_dados(df, colunas, 'Código de Barras', 'CodBarras', conexao, tamanho_lote, progresso, telemetria)
+    return inserir_dados(df, colunas, 'Código de Barras', comando_sql, conexao, tamanho_lote, commit_a_cada, progresso, telemetria, quarentena)
+
+# Colunas canônicas usadas por cada tabela de destino
+COLUNAS_TABELAS = {
+    "produtos": ["ID", "Produto", "Unidade", "Ncm", "Cest"],
+    "precos": ["ID", "Custo", "Margem", "Unitário"],
+    "codbarras": ["ID", "CódigoBarras"],
+}
+
+# DataFrame tratado compartilhado pelas tabelas de destino: cada projeção (Produtos, ProdPreco, CodBarras)
+# é montada sobre os próprios arrays do DataFrame, somente leitura e sem cópia, e as colunas de preço
+# derivadas são calculadas uma única vez, quando a primeira projeção de preços é pedida
+class ConjuntoTratado:
+    def __init__(self, df, colunas, column_mappings_file=ARQUIVO_MAPEAMENTO, telemetria=None):
+        self.df = df
+        self.colunas = colunas
+        self.column_mappings_file = column_mappings_file
+        self.telemetria = telemetria
+        self._derivadas = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    # Colunas de preço resolvidas e indicadores de ajuste (calculados na primeira chamada)
+    def derivadas(self):
+        with self._lock:
+            if self._derivadas is None:
+                colunas = obter_mapeamento(self.column_mappings_file).resolver(self.df.columns)
+                if not colunas["Custo"] or not colunas["Unitário"] or not colunas["Margem"]:
+                    raise KeyError("Coluna não encontrada no DataFrame. Verifique os mapeamentos.")
+                with medir(self.telemetria, "resolucao_margem", len(self.df)):
+                    self._derivadas = derivar_precos(self.df, colunas["Custo"], colunas["Unitário"], colunas["Margem"])
+            return self._derivadas
+
+    # Projeção somente leitura de uma tabela de destino (por padrão, com as colunas mapeadas da tabela);
+    # na de preços, as colunas de custo, margem e unitário são trocadas pelas derivadas
+    def projecao(self, tabela, nomes=None):
+        if nomes is None:
+            nomes = get_valid_columns(*(self.colunas.get(key) for key in COLUNAS_TABELAS[tabela]))
+        dados = {nome: self.df[nome] for nome in nomes}
+        if tabela == "precos":
+            dados.update({nome: valores for nome, valores in self.derivadas().items() if nome in dados or nome not in self.df.columns})
+        return montar_quadro(self.df, dados)
+
+# Funções de inserção de cada tabela de destino
+FUNCOES_INSERCAO = {
+    "produtos": inserir_produtos,
+    "precos": inserir_precos,
+    "codbarras": inserir_codigo_barras,
+}
+
+# Função para inserir um DataFrame tratado nas tabelas escolhidas (na ordem informada)
+def carregar_tabelas(df, colunas, tabelas, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir", quarentena=None):
+    resultado = {}
+    conjunto = ConjuntoTratado(df, colunas, column_mappings_file, telemetria)
+    for tabela in tabelas:
+        projecao = conjunto.projecao(tabela)
+        resultado[tabela] = FUNCOES_INSERCAO[tabela](projecao, colunas, column_mappings_file, conexao, tamanho_lote, telemetria=telemetria, modo=modo, quarentena=quarentena)
+    return resultado
+
+# Função para ler e tratar um arquivo CSV completo
+def ler_csv_tratado(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, substituir_id=False, telemetria=None):
+    with medir(telemetria, "leitura") as etapa:
+        column_mappings = obter_mapeamento(column_mappings_file)
+        df = ler_csv_tipado(caminho, column_mappings)
+        etapa["linhas"] = len(df)
+    return preparar_dados(df, column_mappings, substituir_id, telemetria=telemetria)
+
+# Função para importar um arquivo CSV completo para as tabelas escolhidas
+def importar_csv(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir", quarentena=None):
+    df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+    return carregar_tabelas(df, colunas, tabelas, column_mappings_file, conexao, tamanho_lote, telemetria, modo, quarentena)
+
+# Função para importar um arquivo CSV em blocos; cada bloco é tratado e inserido antes da leitura do próximo
+def importar_csv_em_blocos(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, tamanho_bloco=TAMANHO_BLOCO_LEITURA, telemetria=None, modo="inserir", quarentena=None):
+    column_mappings = obter_mapeamento(column_mappings_file)
+    resultado = dict.fromkeys(tabelas, 0)
+    for bloco, colunas in ler_csv_em_blocos(caminho, column_mappings, substituir_id, tamanho_bloco, telemetria):
+        for tabela, linhas in carregar_tabelas(bloco, colunas, tabelas, column_mappings_file, conexao, tamanho_lote, telemetria, modo, quarentena).items():
+            resultado[tabela] += linhas
+    return resultado
@@ -0,0 +1,84 @@
+import numpy as np
+
+# Motor de preços em ponto fixo: custo, unitário e margem são tratados como inteiros (int64) com
+# 4 casas decimais, a mesma precisão das colunas DECIMAL(18, 4) de ProdPreco (R$ 36,2654 = 362654
+# e 12,34% = 123400), com uma máscara de validade ao lado de cada array. Comparação, correção e
+# indicadores são calculados só com inteiros, sem o erro de arredondamento do float, e as linhas
+# com custo zero são tratadas à parte.
+
+# Escalas do ponto fixo: unidades por real e por ponto percentual
+ESCALA_PRECO = 10000
+ESCALA_MARGEM = 10000
+
+# Diferença máxima aceita entre a margem informada e a calculada (0,01 ponto percentual)
+TOLERANCIA_MARGEM = 100
+
+# Folga somada antes de arredondar, para descartar o ruído do float (ex.: 0.00015 * 10000 = 1.4999999999999998)
+FOLGA_RUIDO = 1e-4
+
+# Função para converter valores decimais (float) para inteiros na escala informada; retorna (valores, válidos)
+def para_ponto_fixo(valores, escala):
+    valores = np.asarray(valores, dtype=float)
+    validos = np.isfinite(valores)
+    escalados = np.where(validos, valores, 0.0)
+    escalados *= escala
+    # Arredondamento comercial (metade para longe do zero), como nos valores digitados
+    inteiros = np.abs(escalados)
+    inteiros += 0.5 + FOLGA_RUIDO
+    np.floor(inteiros, out=inteiros)
+    np.copysign(inteiros, escalados, out=inteiros)
+    return inteiros.astype(np.int64), validos
+
+# Função para voltar da escala inteira para float (NaN onde o valor não é válido)
+def para_decimal(inteiros, validos, escala):
+    return np.where(validos, inteiros / escala, np.nan)
+
+# Função para dividir inteiros arredondando a metade para cima (divisor diferente de zero)
+def dividir_arredondado(numerador, divisor):
+    negativo = divisor < 0
+    numerador = np.where(negativo, -numerador, numerador)
+    divisor = np.abs(divisor)
+    return (2 * numerador + divisor) // (2 * divisor)
+
+# Função para calcular a margem (em ESCALA_MARGEM) a partir de custo e unitário em ponto fixo;
+# só é definida onde o custo é diferente de zero
+def calcular_margem(custo, unitario, definida):
+    divisor = np.where(definida, custo, 1)
+    numerador = unitario - custo
+    numerador *= 100 * ESCALA_MARGEM
+    return dividir_arredondado(numerador, divisor)
+
+# Função para resolver custos, unitários e margens em ponto fixo.
+# Recebe arrays float e devolve um dicionário com os arrays inteiros, as máscaras e os indicadores.
+def resolver_precos(custo, unitario, margem):
+    custo, custo_valido = para_ponto_fixo(custo, ESCALA_PRECO)
+    unitario, unitario_valido = para_ponto_fixo(unitario, ESCALA_PRECO)
+    margem, margem_valida = para_ponto_fixo(margem, ESCALA_MARGEM)
+
+    # Preencher custo ausente com o unitário e unitário ausente com o custo
+    custo_alterado = ~custo_valido
+    custo = np.where(custo_valido, custo, unitario)
+    unitario_alterado = ~unitario_valido
+    unitario = np.where(unitario_valido, unitario, custo)
+    precos_validos = custo_valido | unitario_valido
+
+    # Com custo zero a margem não é definida: a informada é mantida e a linha é sinalizada
+    custo_zero = precos_validos & (custo == 0)
+    definida = precos_validos & ~custo_zero
+    margem_calculada = calcular_margem(custo, unitario, definida)
+
+    # Recalcular a margem onde ela foi informada e difere da calculada
+    margem_incorreta = margem_valida & definida & (np.abs(margem - margem_calculada) > TOLERANCIA_MARGEM)
+    margem = np.where(margem_incorreta, margem_calculada, margem)
+
+    return {
+        "custo": custo,
+        "unitario": unitario,
+        "margem": margem,
+        "precos_validos": precos_validos,
+        "margem_valida": margem_valida,
+        "custo_alterado": custo_alterado,
+        "unitario_alterado": unitario_alterado,
+        "margem_incorreta": margem_incorreta,
+        "custo_zero": custo_zero,
+    }
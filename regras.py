@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+
+import pandas as pd
+
+# Motor de regras de limpeza: cada coluna canônica declara, no cleaning_rules.json (ao lado do
+# column_mappings.json), a sequência de transformações a aplicar. As regras são compiladas uma vez
+# em operações vetorizadas sobre a coluna inteira e recompiladas apenas quando o arquivo muda.
+
+ARQUIVO_REGRAS = 'cleaning_rules.json'
+
+# Regras padrão (equivalentes ao tratamento original da aplicação)
+DEFAULT_RULES = {
+    "Produto": [{"regra": "strip"}, {"regra": "upper"}],
+    "Unidade": [{"regra": "preencher_nulos", "valor": "UN"}],
+    "Ncm": [{"regra": "inteiro_texto"}],
+    "Cest": [{"regra": "preencher_nulos", "valor": ""}],
+    "CódigoBarras": [{"regra": "preencher_com_coluna", "coluna": "ID"}],
+}
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+# Funções de cada regra: recebem a coluna, o DataFrame, o mapeamento de colunas e os parâmetros da regra
+
+def _strip(serie, df, colunas):
+    return serie.str.strip()
+
+def _upper(serie, df, colunas):
+    return serie.str.upper()
+
+def _lower(serie, df, colunas):
+    return serie.str.lower()
+
+def _preencher_nulos(serie, df, colunas, valor=""):
+    # Colunas categóricas (ex.: Unidade) só aceitam valores que já sejam categorias
+    if isinstance(serie.dtype, pd.CategoricalDtype) and valor not in serie.cat.categories:
+        serie = serie.cat.add_categories([valor])
+    return serie.fillna(valor)
+
+# Números lidos como float (ex.: 87169090.0) viram texto sem o ponto decimal; nulos viram vazio
+def _inteiro_texto(serie, df, colunas):
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.astype('Int64').astype(str).mask(serie.isna(), '')
+    return serie.astype(str).str.replace(r'\.0+$', '', regex=True).mask(serie.isna(), '')
+
+def _somente_digitos(serie, df, colunas):
+    return _inteiro_texto(serie, df, colunas).str.replace(r'\D', '', regex=True)
+
+def _remover(serie, df, colunas, caracteres=""):
+    return serie.astype(str).str.translate(str.maketrans('', '', caracteres)).mask(serie.isna(), serie)
+
+def _substituir(serie, df, colunas, de="", para=""):
+    return serie.str.replace(de, para, regex=False)
+
+# Preenche os nulos com o valor de outra coluna canônica (ex.: código de barras a partir do ID)
+def _preencher_com_coluna(serie, df, colunas, coluna):
+    origem = colunas.get(coluna)
+    if origem is None:
+        return serie
+    return serie.fillna(df[origem].astype(str))
+
+REGRAS = {
+    "strip": _strip,
+    "upper": _upper,
+    "lower": _lower,
+    "preencher_nulos": _preencher_nulos,
+    "inteiro_texto": _inteiro_texto,
+    "somente_digitos": _somente_digitos,
+    "remover": _remover,
+    "substituir": _substituir,
+    "preencher_com_coluna": _preencher_com_coluna,
+}
+
+# Função para compilar as regras do arquivo em uma lista (coluna canônica, [(função, parâmetros)])
+def compilar_regras(regras):
+    compiladas = []
+    for key, passos in regras.items():
+        funcoes = []
+        for passo in passos:
+            parametros = dict(passo)
+            nome = parametros.pop("regra", None)
+            if nome not in REGRAS:
+                raise ValueError(f"Regra de limpeza desconhecida para '{key}': {nome}. Disponíveis: {', '.join(REGRAS)}")
+            funcoes.append((REGRAS[nome], parametros))
+        compiladas.append((key, funcoes))
+    return compiladas
+
+# Regras compiladas, com a versão do arquivo de origem
+class RegrasLimpeza:
+    def __init__(self, regras, versao=None):
+        self.regras = regras
+        self.versao = versao
+        self.passos = compilar_regras(regras)
+
+    # Aplica as regras a cada coluna mapeada do DataFrame (colunas ausentes são ignoradas)
+    def aplicar(self, df, colunas):
+        for key, funcoes in self.passos:
+            coluna = colunas.get(key)
+            if coluna is None or coluna not in df.columns:
+                continue
+            serie = df[coluna]
+            for funcao, parametros in funcoes:
+                serie = funcao(serie, df, colunas, **parametros)
+            df[coluna] = serie
+        return df
+
+# Função para identificar a versão do arquivo de regras (None quando o arquivo não existe)
+def versao_regras(file_name=ARQUIVO_REGRAS):
+    if not os.path.exists(file_name):
+        return None
+    stat = os.stat(file_name)
+    return (stat.st_mtime_ns, stat.st_size)
+
+# Função para obter as regras compiladas; sem arquivo, valem as regras padrão
+def obter_regras(file_name=ARQUIVO_REGRAS):
+    caminho = os.path.abspath(file_name)
+    versao = versao_regras(caminho)
+    with _cache_lock:
+        compiladas = _cache.get(caminho)
+        if compiladas is None or compiladas.versao != versao:
+            if versao is None:
+                compiladas = RegrasLimpeza(DEFAULT_RULES)
+            else:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    compiladas = RegrasLimpeza(json.load(f), versao)
+            _cache[caminho] = compiladas
+    return compiladas
+
+# Função para salvar as regras de limpeza (valida antes de gravar)
+def salvar_regras(regras, file_name=ARQUIVO_REGRAS):
+    compilar_regras(regras)
+    with open(file_name, 'w', encoding='utf-8') as f:
+        json.dump(regras, f, indent=4, ensure_ascii=False)
+    with _cache_lock:
+        _cache.pop(os.path.abspath(file_name), None)
@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+# Detecção de produtos quase duplicados: as descrições são normalizadas (sem acentos, pontuação e
+# espaços extras), cada descrição distinta recebe uma assinatura MinHash de n-gramas de caracteres e
+# um índice LSH (faixas da assinatura) agrupa os candidatos em tempo aproximadamente linear, sem
+# comparar todos os pares. Os grupos encontrados são apenas sugeridos: a remoção é feita após revisão.
+
+LIMIAR_SIMILARIDADE = 0.8
+NUM_PERMUTACOES = 64
+NUM_FAIXAS = 16
+TAMANHO_NGRAMA = 3
+# Quantidade de descrições processadas por vez no cálculo das assinaturas (limita a memória)
+TAMANHO_BLOCO_ASSINATURAS = 50000
+
+# Função para normalizar as descrições de forma vetorizada (maiúsculas, sem acentos, pontuação e espaços extras)
+def normalizar_descricoes(serie):
+    return (
+        serie.fillna('').astype(str)
+        .str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+        .str.upper()
+        .str.replace(r'[^0-9A-Z]+', ' ', regex=True)
+        .str.strip()
+    )
+
+# Função para gerar os coeficientes das permutações (hash universal a * x + b em 64 bits)
+def _coeficientes(num_perm, semente):
+    rng = np.random.default_rng(semente)
+    a = rng.integers(1, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64) | np.uint64(1)
+    b = rng.integers(0, np.iinfo(np.int64).max, size=num_perm, dtype=np.int64).astype(np.uint64)
+    return a, b
+
+# Função para calcular as assinaturas MinHash (uma linha por texto, uma coluna por permutação)
+def assinaturas_minhash(textos, num_perm=NUM_PERMUTACOES, tamanho_ngrama=TAMANHO_NGRAMA, semente=0):
+    a, b = _coeficientes(num_perm, semente)
+    assinaturas = np.empty((len(textos), num_perm), dtype=np.uint64)
+    for inicio in range(0, len(textos), TAMANHO_BLOCO_ASSINATURAS):
+        bloco = textos[inicio:inicio + TAMANHO_BLOCO_ASSINATURAS]
+        # Textos curtos geram um único n-grama (o próprio texto)
+        ngramas = [
+            [t[i:i + tamanho_ngrama] for i in range(max(len(t) - tamanho_ngrama + 1, 1))]
+            for t in bloco
+        ]
+        quantidades = np.fromiter((len(n) for n in ngramas), dtype=np.int64, count=len(ngramas))
+        inicios = np.concatenate(([0], np.cumsum(quantidades)[:-1]))
+        hashes = pd.util.hash_array(np.array([g for n in ngramas for g in n], dtype=object))
+        with np.errstate(over='ignore'):
+            for p in range(num_perm):
+                assinaturas[inicio:inicio + len(bloco), p] = np.minimum.reduceat(a[p] * hashes + b[p], inicios)
+    return assinaturas
+
+# Função para unir os pares candidatos em grupos (propagação do menor rótulo, vetorizada)
+def _componentes(n, origem, destino):
+    rotulos = np.arange(n)
+    while True:
+        menor = np.minimum(rotulos[origem], rotulos[destino])
+        novos = rotulos.copy()
+        np.minimum.at(novos, origem, menor)
+        np.minimum.at(novos, destino, menor)
+        novos = novos[novos]
+        if np.array_equal(novos, rotulos):
+            return rotulos
+        rotulos = novos
+
+# Função para agrupar assinaturas semelhantes com o índice LSH: textos que coincidem em uma faixa
+# são candidatos e são ligados ao primeiro texto da mesma faixa se a similaridade estimada bastar
+def agrupar_assinaturas(assinaturas, num_faixas=NUM_FAIXAS, limiar=LIMIAR_SIMILARIDADE):
+    n, num_perm = assinaturas.shape
+    linhas_faixa = num_perm // num_faixas
+    origens, destinos = [], []
+    posicoes = np.arange(n)
+    for faixa in range(num_faixas):
+        chaves = pd.util.hash_pandas_object(
+            pd.DataFrame(assinaturas[:, faixa * linhas_faixa:(faixa + 1) * linhas_faixa]), index=False
+        ).to_numpy()
+        codigos = pd.factorize(chaves)[0]
+        primeiros = pd.Series(posicoes).groupby(codigos).transform('min').to_numpy()
+        candidatos = posicoes != primeiros
+        origem, destino = posicoes[candidatos], primeiros[candidatos]
+        similaridade = (assinaturas[origem] == assinaturas[destino]).mean(axis=1)
+        confirmados = similaridade >= limiar
+        origens.append(origem[confirmados])
+        destinos.append(destino[confirmados])
+    return _componentes(n, np.concatenate(origens), np.concatenate(destinos))
+
+# Função para detectar grupos de produtos quase duplicados em uma coluna de descrição.
+# Retorna um DataFrame com uma linha por produto agrupado (Indice = índice no DataFrame original).
+def detectar_quase_duplicados(df, coluna, limiar=LIMIAR_SIMILARIDADE, num_perm=NUM_PERMUTACOES, num_faixas=NUM_FAIXAS, tamanho_ngrama=TAMANHO_NGRAMA):
+    normalizadas = normalizar_descricoes(df[coluna])
+    # Descrições idênticas após a normalização compartilham a mesma assinatura
+    codigos, distintas = pd.factorize(normalizadas)
+    assinaturas = assinaturas_minhash(list(distintas), num_perm, tamanho_ngrama)
+    rotulos = agrupar_assinaturas(assinaturas, num_faixas, limiar)[codigos]
+
+    grupos = pd.DataFrame({
+        "Indice": df.index,
+        "Grupo": rotulos,
+        "Descricao": df[coluna].to_numpy(),
+        "Normalizada": normalizadas.to_numpy(),
+    })
+    grupos = grupos[grupos["Grupo"].duplicated(keep=False)].copy()
+    # Similaridade estimada com o primeiro produto do grupo (o que é mantido por padrão)
+    codigos_grupo = pd.Series(codigos[grupos.index], index=grupos.index)
+    representantes = codigos_grupo.groupby(grupos["Grupo"]).transform('first').to_numpy()
+    grupos["Similaridade"] = (assinaturas[codigos_grupo.to_numpy()] == assinaturas[representantes]).mean(axis=1).round(2)
+    grupos["Grupo"] = pd.factorize(grupos["Grupo"])[0] + 1
+    return grupos.sort_values(["Grupo", "Indice"], kind='stable').reset_index(drop=True)
+
+# Função para marcar os produtos mantidos por padrão: o primeiro de cada grupo e os que, pelo encadeamento
+# do agrupamento, ficaram abaixo do limiar em relação a ele (ex.: outros tamanhos do mesmo produto)
+def manter_por_padrao(grupos, limiar=LIMIAR_SIMILARIDADE):
+    return ~grupos["Grupo"].duplicated() | (grupos["Similaridade"] < limiar)
+
+# Função para remover os quase duplicados: mantém os produtos marcados por padrão ou os índices escolhidos na revisão
+def remover_quase_duplicados(df, grupos, manter=None, limiar=LIMIAR_SIMILARIDADE):
+    if manter is None:
+        manter = grupos.loc[manter_por_padrao(grupos, limiar), "Indice"]
+    remover = grupos.loc[~grupos["Indice"].isin(manter), "Indice"]
+    return df.drop(index=remover)
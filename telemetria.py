@@ -0,0 +1,109 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+# Instrumentação do processo de importação: tempo de cada etapa, linhas/s, pico de memória
+# e um canal de progresso com limitação de frequência (para não enviar um evento por linha).
+
+# Intervalo mínimo (em segundos) entre dois eventos de progresso da mesma etapa
+INTERVALO_PROGRESSO = 0.25
+
+# Função para obter o pico de memória do processo em MB (ru_maxrss; no Windows, peak_wset do psutil)
+def pico_memoria_mb():
+    if sys.platform == 'win32':
+        try:
+            import psutil
+            return round(psutil.Process().memory_info().peak_wset / 1024 ** 2, 1)
+        except ImportError:
+            return None
+    try:
+        import resource
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss vem em bytes no macOS e em KB no Linux
+        return round(maxrss / 1024 ** 2 if sys.platform == 'darwin' else maxrss / 1024, 1)
+    except ImportError:
+        return None
+
+class Telemetria:
+    def __init__(self, intervalo_progresso=INTERVALO_PROGRESSO):
+        self.intervalo_progresso = intervalo_progresso
+        self.etapas = {}
+        self.assinantes = []
+        self.inicio = time.perf_counter()
+        self.iniciado_em = datetime.now().isoformat(timespec='seconds')
+        self._ultimo_evento = {}
+        self._lock = threading.Lock()
+
+    # Mede o tempo de uma etapa; etapas com o mesmo nome (ex.: blocos de leitura) são acumuladas.
+    # O dicionário retornado permite informar as linhas processadas depois de executar a etapa.
+    @contextmanager
+    def etapa(self, nome, linhas=None):
+        info = {"linhas": linhas}
+        inicio = time.perf_counter()
+        try:
+            yield info
+        finally:
+            segundos = time.perf_counter() - inicio
+            with self._lock:
+                registro = self.etapas.setdefault(nome, {"segundos": 0.0, "linhas": 0, "execucoes": 0})
+                registro["segundos"] += segundos
+                registro["linhas"] += info["linhas"] or 0
+                registro["execucoes"] += 1
+
+    # Registra uma função que recebe os eventos de progresso
+    def assinar(self, funcao):
+        self.assinantes.append(funcao)
+        return funcao
+
+    # Publica o progresso de uma etapa; eventos mais próximos que o intervalo mínimo são descartados
+    # (o evento final, com valor 1.0, é sempre enviado)
+    def publicar_progresso(self, etapa, valor, linhas=None):
+        agora = time.perf_counter()
+        with self._lock:
+            ultimo = self._ultimo_evento.get(etapa)
+            if valor < 1.0 and ultimo is not None and agora - ultimo < self.intervalo_progresso:
+                return False
+            self._ultimo_evento[etapa] = agora
+        evento = {"etapa": etapa, "progresso": valor, "linhas": linhas, "decorrido": round(agora - self.inicio, 3)}
+        for funcao in list(self.assinantes):
+            funcao(evento)
+        return True
+
+    # Retorna uma função de progresso (valor de 0 a 1) ligada a uma etapa
+    def canal_progresso(self, etapa):
+        return lambda valor: self.publicar_progresso(etapa, valor)
+
+    # Registro das métricas da execução em formato serializável em JSON
+    def registro(self):
+        with self._lock:
+            etapas = {
+                nome: {
+                    "segundos": round(info["segundos"], 4),
+                    "linhas": info["linhas"],
+                    "execucoes": info["execucoes"],
+                    "linhas_por_segundo": round(info["linhas"] / info["segundos"], 1) if info["segundos"] > 0 and info["linhas"] else None,
+                }
+                for nome, info in self.etapas.items()
+            }
+        return {
+            "iniciado_em": self.iniciado_em,
+            "duracao_segundos": round(time.perf_counter() - self.inicio, 4),
+            "pico_memoria_mb": pico_memoria_mb(),
+            "etapas": etapas,
+        }
+
+    def para_json(self):
+        return json.dumps(self.registro(), ensure_ascii=False, indent=4)
+
+    def salvar(self, caminho):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            f.write(self.para_json())
+
+# Função auxiliar para medir uma etapa quando a telemetria é opcional
+def medir(telemetria, nome, linhas=None):
+    if telemetria is None:
+        return nullcontext({"linhas": linhas})
+    return telemetria.etapa(nome, linhas)
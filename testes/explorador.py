@@ -0,0 +1,159 @@
+import time
+
+import pandas as pd
+
+# Consultas do explorador de tabelas SQL, sem dependência do Streamlit: catálogo de bancos,
+# tabelas e colunas, e leitura paginada no servidor (OFFSET/FETCH no SQL Server, LIMIT/OFFSET
+# no SQLite) com fetchmany, para não trazer a tabela inteira para a memória.
+
+TAMANHO_PAGINA = 100
+TAMANHO_FETCH = 500
+
+# Função para identificar conexões SQLite (usadas nos testes locais)
+def eh_sqlite(conn):
+    return type(conn).__module__.startswith('sqlite3')
+
+# Função para escrever um nome de tabela/coluna entre delimitadores (evita injeção pelo nome)
+def citar_identificador(nome, sqlite=False):
+    if sqlite:
+        return '"' + str(nome).replace('"', '""') + '"'
+    return '[' + str(nome).replace(']', ']]') + ']'
+
+# Função para executar uma consulta e ler o resultado em partes (fetchmany)
+def _consultar(conn, comando, parametros=(), tamanho_fetch=TAMANHO_FETCH):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(comando, parametros)
+        colunas = [desc[0] for desc in cursor.description]
+        linhas = []
+        while True:
+            parte = cursor.fetchmany(tamanho_fetch)
+            if not parte:
+                break
+            linhas.extend(tuple(linha) for linha in parte)
+        return colunas, linhas
+    finally:
+        cursor.close()
+
+# Função para listar os bancos de dados do servidor
+def listar_bancos(conn):
+    return [linha[0] for linha in _consultar(conn, "SELECT name FROM sys.databases;")[1]]
+
+# Função para listar as tabelas do banco conectado
+def listar_tabelas(conn):
+    if eh_sqlite(conn):
+        comando = "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%' ORDER BY name;"
+    else:
+        comando = "SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE' ORDER BY TABLE_NAME;"
+    return [linha[0] for linha in _consultar(conn, comando)[1]]
+
+# Função para listar as colunas de uma tabela (na ordem da tabela)
+def listar_colunas(conn, tabela):
+    if eh_sqlite(conn):
+        return [linha[1] for linha in _consultar(conn, f"PRAGMA table_info({citar_identificador(tabela, True)});")[1]]
+    comando = "SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = ? ORDER BY ORDINAL_POSITION;"
+    return [linha[0] for linha in _consultar(conn, comando, (tabela,))[1]]
+
+# Função para listar as colunas da chave primária de uma tabela (na ordem da chave; vazia se não houver)
+def listar_chave_primaria(conn, tabela):
+    if eh_sqlite(conn):
+        linhas = _consultar(conn, f"PRAGMA table_info({citar_identificador(tabela, True)});")[1]
+        return [linha[1] for linha in sorted((linha for linha in linhas if linha[5]), key=lambda linha: linha[5])]
+    comando = (
+        "SELECT k.COLUMN_NAME FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS t "
+        "JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE k ON k.CONSTRAINT_NAME = t.CONSTRAINT_NAME "
+        "AND k.TABLE_SCHEMA = t.TABLE_SCHEMA AND k.TABLE_NAME = t.TABLE_NAME "
+        "WHERE t.CONSTRAINT_TYPE = 'PRIMARY KEY' AND t.TABLE_NAME = ? ORDER BY k.ORDINAL_POSITION;"
+    )
+    return [linha[0] for linha in _consultar(conn, comando, (tabela,))[1]]
+
+# Função para escolher a ordem padrão da paginação: a chave primária ou, sem chave, a primeira coluna
+# escolhida (páginas estáveis entre consultas)
+def ordem_padrao(chave, colunas):
+    return list(chave) if chave else list(colunas[:1])
+
+# Função para contar as linhas de uma tabela
+def contar_linhas(conn, tabela):
+    tabela_sql = citar_identificador(tabela, eh_sqlite(conn))
+    return _consultar(conn, f"SELECT COUNT(*) FROM {tabela_sql};")[1][0][0]
+
+# Função para montar a consulta de uma página (apenas as colunas escolhidas); ordem é uma coluna
+# ou uma lista de colunas
+def consulta_pagina(tabela, colunas=None, ordem=None, sqlite=False):
+    lista = ", ".join(citar_identificador(c, sqlite) for c in colunas) if colunas else "*"
+    tabela_sql = citar_identificador(tabela, sqlite)
+    ordem = [ordem] if isinstance(ordem, str) else list(ordem or [])
+    if sqlite:
+        ordenacao = f" ORDER BY {', '.join(citar_identificador(c, True) for c in ordem)}" if ordem else ""
+        return f"SELECT {lista} FROM {tabela_sql}{ordenacao} LIMIT ? OFFSET ?;", False
+    # OFFSET/FETCH exige ORDER BY; sem coluna de ordem usa-se a ordem física
+    ordenacao = ", ".join(citar_identificador(c) for c in ordem) if ordem else "(SELECT NULL)"
+    return f"SELECT {lista} FROM {tabela_sql} ORDER BY {ordenacao} OFFSET ? ROWS FETCH NEXT ? ROWS ONLY;", True
+
+# Função para ler uma página da tabela (pagina começa em 1) como DataFrame. Sem ordem informada,
+# ordena pela chave primária ou, sem chave, pela primeira coluna escolhida
+def ler_pagina(conn, tabela, colunas=None, pagina=1, tamanho_pagina=TAMANHO_PAGINA, ordem=None):
+    if not ordem:
+        ordem = ordem_padrao(listar_chave_primaria(conn, tabela), colunas or listar_colunas(conn, tabela))
+    comando, offset_primeiro = consulta_pagina(tabela, colunas, ordem, eh_sqlite(conn))
+    inicio = (pagina - 1) * tamanho_pagina
+    parametros = (inicio, tamanho_pagina) if offset_primeiro else (tamanho_pagina, inicio)
+    nomes, linhas = _consultar(conn, comando, parametros, min(tamanho_pagina, TAMANHO_FETCH))
+    return pd.DataFrame.from_records(linhas, columns=nomes)
+
+# Quantidade padrão de linhas por bloco na transferência entre conexões
+TAMANHO_BLOCO_TRANSFERENCIA = 5000
+
+# Função para copiar linhas de uma tabela da conexão de origem para uma tabela da conexão de destino.
+# Lê com fetchmany e grava com executemany, um bloco por vez (memória constante); tudo em uma transação
+# no destino, a menos que commit_a_cada seja informado.
+def transferir_tabela(origem, destino, tabela_origem, tabela_destino=None, colunas=None, colunas_destino=None, tamanho_bloco=TAMANHO_BLOCO_TRANSFERENCIA, commit_a_cada=None, progresso=None):
+    tabela_destino = tabela_destino or tabela_origem
+    colunas = colunas or listar_colunas(origem, tabela_origem)
+    colunas_destino = colunas_destino or colunas
+    if len(colunas_destino) != len(colunas):
+        raise ValueError("A quantidade de colunas de origem e de destino deve ser a mesma.")
+
+    sqlite_origem, sqlite_destino = eh_sqlite(origem), eh_sqlite(destino)
+    consulta = f"SELECT {', '.join(citar_identificador(c, sqlite_origem) for c in colunas)} FROM {citar_identificador(tabela_origem, sqlite_origem)};"
+    comando = (
+        f"INSERT INTO {citar_identificador(tabela_destino, sqlite_destino)} "
+        f"({', '.join(citar_identificador(c, sqlite_destino) for c in colunas_destino)}) "
+        f"VALUES ({', '.join('?' for _ in colunas_destino)})"
+    )
+
+    cursor_origem = origem.cursor()
+    cursor_destino = destino.cursor()
+    if hasattr(cursor_destino, 'fast_executemany'):
+        cursor_destino.fast_executemany = True
+    linhas = 0
+    pendentes = 0
+    inicio = time.perf_counter()
+    try:
+        cursor_origem.execute(consulta)
+        while True:
+            bloco = cursor_origem.fetchmany(tamanho_bloco)
+            if not bloco:
+                break
+            cursor_destino.executemany(comando, [tuple(linha) for linha in bloco])
+            linhas += len(bloco)
+            pendentes += len(bloco)
+            if commit_a_cada and pendentes >= commit_a_cada:
+                destino.commit()
+                pendentes = 0
+            if progresso is not None:
+                progresso(linhas)
+        destino.commit()
+    except Exception:
+        destino.rollback()
+        raise
+    finally:
+        cursor_origem.close()
+        cursor_destino.close()
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "linhas": linhas,
+        "segundos": round(segundos, 3),
+        "linhas_por_segundo": round(linhas / segundos, 1) if segundos > 0 else None,
+    }
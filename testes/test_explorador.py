@@ -0,0 +1,29 @@
+import sqlite3
+
+import explorador
+
+# Teste da transferência entre conexões: copia uma tabela entre dois arquivos SQLite temporários
+# (em blocos menores que a tabela) e compara a quantidade de linhas e o conteúdo.
+
+# Função para criar a tabela de teste em um arquivo SQLite
+def criar_tabela(caminho, linhas=()):
+    conn = sqlite3.connect(caminho)
+    conn.execute('CREATE TABLE "Produtos" (ID_Prod INTEGER PRIMARY KEY, Produto TEXT, "Preço" REAL)')
+    conn.executemany('INSERT INTO "Produtos" VALUES (?, ?, ?)', linhas)
+    conn.commit()
+    return conn
+
+def test_transferir_tabela_entre_sqlite(tmp_path):
+    linhas = [(i, f"Produto {i}" if i % 7 else None, i * 1.25) for i in range(1, 1235)]
+    origem = criar_tabela(tmp_path / "origem.db", linhas)
+    destino = criar_tabela(tmp_path / "destino.db")
+    try:
+        resultado = explorador.transferir_tabela(origem, destino, "Produtos", tamanho_bloco=100)
+
+        assert resultado["linhas"] == len(linhas)
+        assert explorador.contar_linhas(destino, "Produtos") == explorador.contar_linhas(origem, "Produtos")
+        consulta = 'SELECT ID_Prod, Produto, "Preço" FROM "Produtos" ORDER BY ID_Prod'
+        assert destino.execute(consulta).fetchall() == origem.execute(consulta).fetchall() == linhas
+    finally:
+        origem.close()
+        destino.close()
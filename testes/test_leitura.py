@@ -0,0 +1,15 @@
+import pandas as pd
+
+from leitura import converter_dinheiro
+
+# Teste da conversão de valores monetários: o formato pt-BR vale para a coluna inteira, então
+# "1.380" sem vírgula ao lado de "1.380,10" continua sendo mil trezentos e oitenta.
+
+def test_converter_dinheiro_coluna_pt_br_mista():
+    serie = pd.Series(["1.380", "1.380,10", "2.500", None, " 12,5 "], dtype=object)
+    assert converter_dinheiro(serie).tolist()[:3] == [1380.0, 1380.1, 2500.0]
+    assert converter_dinheiro(serie).isna().tolist() == [False, False, False, True, False]
+
+def test_converter_dinheiro_ponto_decimal():
+    serie = pd.Series(["1380.10", "2.5", "36.2654"], dtype=object)
+    assert converter_dinheiro(serie).tolist() == [1380.1, 2.5, 36.2654]
@@ -3,6 +3,8 @@ import pyodbc
 import streamlit as st
 import socket
 
+import explorador
+
 # Função para listar os drivers ODBC instalados no sistema
 def get_drivers():
     drivers = [driver for driver in pyodbc.drivers()]
@@ -13,16 +15,63 @@ def get_server():
     server_name = socket.gethostname()
     return server_name
 
+# Tempo (em segundos) que o catálogo de bancos, tabelas e colunas fica em cache por string de conexão
+TTL_CATALOGO = 300
+
+# Funções em cache do catálogo: só abrem conexão quando a entrada não existe ou expirou.
+# Erros não são guardados em cache (a exceção é tratada nas funções abaixo).
+@st.cache_data(ttl=TTL_CATALOGO, show_spinner=False)
+def catalogo_bancos(server):
+    conn = pyodbc.connect(f"Driver={{SQL Server}};Server={server};Trusted_Connection=yes;")
+    try:
+        return explorador.listar_bancos(conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=TTL_CATALOGO, show_spinner=False)
+def catalogo_tabelas(conn_str):
+    conn = pyodbc.connect(conn_str)
+    try:
+        return explorador.listar_tabelas(conn)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=TTL_CATALOGO, show_spinner=False)
+def catalogo_colunas(conn_str, table_name):
+    conn = pyodbc.connect(conn_str)
+    try:
+        return explorador.listar_colunas(conn, table_name)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=TTL_CATALOGO, show_spinner=False)
+def catalogo_chave_primaria(conn_str, table_name):
+    conn = pyodbc.connect(conn_str)
+    try:
+        return explorador.listar_chave_primaria(conn, table_name)
+    finally:
+        conn.close()
+
+@st.cache_data(ttl=TTL_CATALOGO, show_spinner=False)
+def catalogo_total_linhas(conn_str, table_name):
+    conn = pyodbc.connect(conn_str)
+    try:
+        return explorador.contar_linhas(conn, table_name)
+    finally:
+        conn.close()
+
+# Função para descartar o catálogo em cache (ex.: após criar tabelas ou carregar dados)
+def atualizar_catalogo():
+    catalogo_bancos.clear()
+    catalogo_tabelas.clear()
+    catalogo_colunas.clear()
+    catalogo_chave_primaria.clear()
+    catalogo_total_linhas.clear()
+
 # Função para listar os bancos de dados SQL Server disponíveis em um servidor
 def get_databases(server):
-    conn_str = f"Driver={{SQL Server}};Server={server};Trusted_Connection=yes;"
     try:
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        cursor.execute("SELECT name FROM sys.databases;")
-        databases = [row.name for row in cursor.fetchall()]
-        conn.close()
-        return databases
+        return catalogo_bancos(server)
     except Exception as e:
         st.error(f"Erro ao conectar ao servidor: {e}")
         return []
@@ -40,37 +89,21 @@ def test_db_connection(conn_str):
 # Função para listar as tabelas de um banco de dados selecionado
 def get_tables(conn_str):
     try:
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE = 'BASE TABLE';")
-        tables = [row.TABLE_NAME for row in cursor.fetchall()]
-        conn.close()
-        return tables
+        return catalogo_tabelas(conn_str)
     except Exception as e:
         st.error(f"Erro ao listar tabelas: {e}")
         return []
     
-# Função para obter os dados da tabela selecionada usando pyodbc e transformá-los em DataFrame
-def get_table_data(conn_str, table_name):
+# Função para obter uma página da tabela selecionada (paginação no servidor, apenas as colunas escolhidas,
+# ordenada pela chave primária ou, sem chave, pela primeira coluna)
+def get_table_data(conn_str, table_name, columns=None, pagina=1):
     try:
+        ordem = explorador.ordem_padrao(catalogo_chave_primaria(conn_str, table_name), columns or catalogo_colunas(conn_str, table_name))
         conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        query = f"SELECT * FROM {table_name};"
-        cursor.execute(query)
-
-        # Obter os nomes das colunas da tabela
-        columns = [desc[0] for desc in cursor.description]
-
-        # Buscar todos os dados da tabela
-        rows = cursor.fetchall()
-
-        # Fechar a conexão
-        conn.close()
-
-        # Converter os resultados em um DataFrame do pandas
-        df = pd.DataFrame.from_records(rows, columns=columns)
-
-        return df
+        try:
+            return explorador.ler_pagina(conn, table_name, columns, pagina, explorador.TAMANHO_PAGINA, ordem)
+        finally:
+            conn.close()
     except Exception as e:
         st.error(f"Erro ao obter dados da tabela: {e}")
         return pd.DataFrame() 
@@ -78,16 +111,69 @@ def get_table_data(conn_str, table_name):
 # Função para listar as colunas de uma tabela selecionada
 def get_columns(conn_str, table_name):
     try:
-        conn = pyodbc.connect(conn_str)
-        cursor = conn.cursor()
-        cursor.execute(f"SELECT COLUMN_NAME FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_NAME = '{table_name}';")
-        columns = [row.COLUMN_NAME for row in cursor.fetchall()]
-        conn.close()
-        return columns
+        return catalogo_colunas(conn_str, table_name)
     except Exception as e:
         st.error(f"Erro ao listar colunas: {e}")
         return []    
 
+# Função para exibir a tabela página a página (o total de linhas vem do catálogo em cache)
+def exibir_tabela_paginada(conn_str, table_name, columns, key):
+    try:
+        total = catalogo_total_linhas(conn_str, table_name)
+    except Exception as e:
+        st.error(f"Erro ao contar as linhas da tabela: {e}")
+        return
+    paginas = max((total + explorador.TAMANHO_PAGINA - 1) // explorador.TAMANHO_PAGINA, 1)
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, step=1, key=f"{key}_{table_name}_pagina")
+    st.dataframe(get_table_data(conn_str, table_name, columns, pagina))
+    st.caption(f"{total} linhas na tabela")
+
+# Função para transferir a tabela escolhida na conexão 1 para a tabela escolhida na conexão 2
+def exibir_transferencia():
+    st.title("Transferir Dados (Conexão 1 ➜ Conexão 2)")
+    if not (st.session_state['db_connected'] and st.session_state['db_connected2']):
+        st.info("Conecte os dois bancos de dados para transferir dados.")
+        return
+
+    tabela_origem = st.session_state.get('table')
+    tabela_destino = st.session_state.get('table2')
+    if not tabela_origem or not tabela_destino:
+        st.info("Selecione uma tabela em cada conexão.")
+        return
+
+    # Sem colunas escolhidas na origem, todas as colunas da tabela são transferidas
+    colunas_origem = st.session_state.get('columns') or get_columns(st.session_state['dados_conexao'], tabela_origem)
+    colunas_destino = st.multiselect(
+        f"Colunas de destino em '{tabela_destino}' (na mesma ordem de: {', '.join(colunas_origem)})",
+        get_columns(st.session_state['dados_conexao2'], tabela_destino),
+        key="colunas_transferencia",
+    )
+    tamanho_bloco = st.number_input("Linhas por bloco", min_value=100, value=explorador.TAMANHO_BLOCO_TRANSFERENCIA, step=100, key="bloco_transferencia")
+
+    if st.button(f"Transferir {tabela_origem} ➜ {tabela_destino}"):
+        if len(colunas_destino) != len(colunas_origem):
+            st.error("Escolha uma coluna de destino para cada coluna de origem.")
+            return
+        progresso_texto = st.empty()
+        try:
+            origem = pyodbc.connect(st.session_state['dados_conexao'])
+            destino = pyodbc.connect(st.session_state['dados_conexao2'])
+            try:
+                relatorio = explorador.transferir_tabela(
+                    origem, destino, tabela_origem, tabela_destino, colunas_origem, colunas_destino, int(tamanho_bloco),
+                    progresso=lambda linhas: progresso_texto.text(f"{linhas} linhas transferidas..."),
+                )
+            finally:
+                origem.close()
+                destino.close()
+            catalogo_total_linhas.clear()
+            st.success(
+                f"{relatorio['linhas']} linhas transferidas em {relatorio['segundos']}s "
+                f"({relatorio['linhas_por_segundo'] or 0:.0f} linhas/s)."
+            )
+        except Exception as e:
+            st.error(f"Erro na transferência: {e}")
+
 # Configurações do Streamlit
 st.set_page_config(page_title="Importação de Dados(Processo ETL)", page_icon="🛠️", layout="wide")
 
@@ -169,18 +255,17 @@ with coll1:
             tables = get_tables(st.session_state['dados_conexao'])
             selected_table = st.selectbox("Selecione uma Tabela", tables,key="table")
 
-            if selected_table:
-            # Carregar os dados da tabela
-             table_data = get_table_data(st.session_state['dados_conexao'], selected_table)
-            
+            if st.button("Atualizar Catálogo", key="atualizar_catalogo"):
+                atualizar_catalogo()
+                st.rerun()
+
             # Selecionar as colunas da tabela
             columns = get_columns(st.session_state['dados_conexao'], selected_table)
             selected_columns = st.multiselect("Selecione as Colunas", columns,key="columns")
             
             # Gerar o DataFrame dinamicamente baseado nas colunas selecionadas
-            if selected_columns:
-                df_selected_columns = table_data[selected_columns]
-                st.dataframe(df_selected_columns)  
+            if selected_table and selected_columns:
+                exibir_tabela_paginada(st.session_state['dados_conexao'], selected_table, selected_columns, "tabela1")
 
  with coll2:
    # Layout da aplicação no Streamlit
@@ -235,20 +320,18 @@ with coll1:
         selected_table2 = st.selectbox("Selecione uma Tabela", tables2, key="table2")
 
         if selected_table2:
-           # Carregar os dados da tabela
-           table_data2 = get_table_data(st.session_state['dados_conexao2'], selected_table2)
-            
            # Selecionar as colunas da tabela
            columns2 = get_columns(st.session_state['dados_conexao2'], selected_table2)
            selected_columns2 = st.multiselect("Selecione as Colunas", columns2, key="columns2")
             
            # Gerar o DataFrame dinamicamente baseado nas colunas selecionadas
            if selected_columns2:
-              df_selected_columns2 = table_data2[selected_columns2]
-              st.dataframe(df_selected_columns2)               
+              exibir_tabela_paginada(st.session_state['dados_conexao2'], selected_table2, selected_columns2, "tabela2")
 
 st.markdown("""---""")       
 
+exibir_transferencia()
+
 st.markdown("""---""")   
 
 if __name__ == "__main__":
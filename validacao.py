@@ -0,0 +1,185 @@
+import numpy as np
+import pandas as pd
+
+from pipeline import ARQUIVO_MAPEAMENTO, ESTRUTURA_TABELAS, TAMANHO_LOTE, carregar_tabelas, ler_csv_tratado
+from telemetria import medir
+
+# Validação prévia das chaves: antes de qualquer gravação, as chaves existentes no destino
+# (Produtos.ID_Prod, ProdPreco.ID_Prod, CodBarras.Cod_Barras) são lidas uma única vez, em blocos,
+# para um conjunto em memória (ou um filtro de Bloom, em tabelas muito grandes), e o DataFrame
+# inteiro é conferido com testes de pertinência vetorizados.
+
+# Acima desta quantidade de chaves usa-se o filtro de Bloom em vez do conjunto exato
+LIMITE_CONJUNTO = 5000000
+# Taxa de falsos positivos do filtro de Bloom (os positivos são confirmados no banco)
+TAXA_FALSOS_POSITIVOS = 0.001
+TAMANHO_FETCH_CHAVES = 50000
+# Quantidade de parâmetros por consulta na confirmação dos candidatos do filtro de Bloom
+TAMANHO_CONFIRMACAO = 250
+
+# Chaves verificadas em cada tabela de destino: (tabela SQL, coluna SQL, coluna canônica)
+CHAVES_DESTINO = {
+    "produtos": ("Produtos", "ID_Prod", "ID"),
+    "precos": ("ProdPreco", "ID_Prod", "ID"),
+    "codbarras": ("CodBarras", "Cod_Barras", "CódigoBarras"),
+}
+
+# Erro levantado quando a validação encontra conflitos; o relatório completo fica em .conflitos
+class ConflitosChaves(Exception):
+    def __init__(self, conflitos):
+        self.conflitos = conflitos
+        resumo = conflitos.groupby(["tabela", "motivo"]).size()
+        detalhes = "; ".join(f"{tabela}/{motivo}: {quantidade}" for (tabela, motivo), quantidade in resumo.items())
+        super().__init__(f"{len(conflitos)} conflitos de chave encontrados antes da carga ({detalhes})")
+
+# Filtro de Bloom com vetor de bits em NumPy; inserção e consulta vetorizadas (hash duplo)
+class FiltroBloom:
+    def __init__(self, capacidade, taxa_falsos_positivos=TAXA_FALSOS_POSITIVOS):
+        capacidade = max(int(capacidade), 1)
+        self.num_bits = int(np.ceil(-capacidade * np.log(taxa_falsos_positivos) / np.log(2) ** 2))
+        self.num_hashes = max(int(round(self.num_bits / capacidade * np.log(2))), 1)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8)
+
+    def _posicoes(self, valores):
+        valores = np.asarray(valores, dtype=object)
+        h1 = pd.util.hash_array(valores, hash_key='bloom-chave-0001')
+        h2 = pd.util.hash_array(valores, hash_key='bloom-chave-0002') | np.uint64(1)
+        passos = np.arange(self.num_hashes, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            return (h1[:, None] + passos[None, :] * h2[:, None]) % np.uint64(self.num_bits)
+
+    def adicionar(self, valores):
+        posicoes = self._posicoes(valores).ravel()
+        np.bitwise_or.at(self.bits, posicoes // 8, (1 << (posicoes % 8)).astype(np.uint8))
+
+    def contem(self, valores):
+        posicoes = self._posicoes(valores)
+        return ((self.bits[posicoes // 8] >> (posicoes % 8).astype(np.uint8)) & 1).all(axis=1).astype(bool)
+
+# Chaves existentes em uma coluna do destino: conjunto exato (pd.Index) ou filtro de Bloom
+class ChavesExistentes:
+    def __init__(self, conn, tabela, coluna, quantidade, indice=None, filtro=None):
+        self.conn = conn
+        self.tabela = tabela
+        self.coluna = coluna
+        self.quantidade = quantidade
+        self.indice = indice
+        self.filtro = filtro
+
+    # Máscara booleana das chaves que existem no destino
+    def contem(self, valores):
+        valores = normalizar_chaves(valores).reset_index(drop=True)
+        if self.indice is not None:
+            return valores.isin(self.indice).to_numpy()
+        mascara = self.filtro.contem(valores.to_numpy())
+        # Os positivos do filtro de Bloom podem ser falsos: confirmam-se os candidatos no banco
+        if mascara.any():
+            confirmados = _confirmar_no_banco(self.conn, self.tabela, self.coluna, valores[mascara].unique())
+            mascara &= valores.isin(confirmados).to_numpy()
+        return mascara
+
+# Função para normalizar chaves para comparação (números lidos como float perdem o ".0")
+def normalizar_chaves(valores):
+    return pd.Series(valores, dtype=object).astype(str).str.replace(r'\.0$', '', regex=True)
+
+# Função para executar uma consulta e ler o resultado em blocos
+def _ler_em_blocos(cursor, tamanho_fetch=TAMANHO_FETCH_CHAVES):
+    while True:
+        bloco = cursor.fetchmany(tamanho_fetch)
+        if not bloco:
+            break
+        yield normalizar_chaves([linha[0] for linha in bloco]).tolist()
+
+# Função para montar os parâmetros da confirmação no tipo da própria coluna (a comparação com a coluna
+# sem CAST usa o índice): colunas inteiras recebem int e descartam candidatos não numéricos; colunas de
+# texto recebem também a forma com ".0", já que as chaves do destino são normalizadas
+def _parametros_confirmacao(tabela, coluna, candidatos):
+    tipo = dict(ESTRUTURA_TABELAS.get(tabela, [])).get(coluna, "")
+    if tipo.upper().startswith("INT"):
+        return [int(valor) for valor in candidatos if str(valor).lstrip('-').isdigit()]
+    return list(candidatos) + [f"{valor}.0" for valor in candidatos]
+
+# Função para confirmar no banco quais candidatos existem de fato (consultas com IN em lotes)
+def _confirmar_no_banco(conn, tabela, coluna, candidatos):
+    existentes = []
+    cursor = conn.cursor()
+    try:
+        for inicio in range(0, len(candidatos), TAMANHO_CONFIRMACAO):
+            lote = _parametros_confirmacao(tabela, coluna, candidatos[inicio:inicio + TAMANHO_CONFIRMACAO])
+            if not lote:
+                continue
+            cursor.execute(f"SELECT {coluna} FROM {tabela} WHERE {coluna} IN ({', '.join('?' for _ in lote)})", lote)
+            for bloco in _ler_em_blocos(cursor):
+                existentes.extend(bloco)
+    finally:
+        cursor.close()
+    return existentes
+
+# Função para carregar as chaves existentes de uma coluna do destino (uma única leitura, em blocos)
+def carregar_chaves(conn, tabela, coluna, limite_conjunto=LIMITE_CONJUNTO):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT COUNT(*) FROM {tabela}")
+        quantidade = cursor.fetchone()[0]
+        cursor.execute(f"SELECT {coluna} FROM {tabela} WHERE {coluna} IS NOT NULL")
+        if quantidade > limite_conjunto:
+            filtro = FiltroBloom(quantidade)
+            for bloco in _ler_em_blocos(cursor):
+                filtro.adicionar(bloco)
+            return ChavesExistentes(conn, tabela, coluna, quantidade, filtro=filtro)
+        chaves = []
+        for bloco in _ler_em_blocos(cursor):
+            chaves.extend(bloco)
+        return ChavesExistentes(conn, tabela, coluna, quantidade, indice=pd.Index(chaves, dtype=object).unique())
+    finally:
+        cursor.close()
+
+# Função para montar as linhas do relatório de conflitos de uma verificação
+def _conflitos(df, mascara, tabela, motivo, coluna_id, coluna_valor):
+    linhas = df[mascara]
+    return pd.DataFrame({
+        "tabela": tabela,
+        "motivo": motivo,
+        "linha": linhas.index,
+        "ID": normalizar_chaves(linhas[coluna_id]).to_numpy(),
+        "valor": normalizar_chaves(linhas[coluna_valor]).to_numpy(),
+    })
+
+# Função para validar o DataFrame tratado contra as chaves do destino, sem gravar nada.
+# Retorna o relatório de conflitos (vazio quando a carga pode prosseguir).
+def validar_chaves(df, colunas, tabelas, conexao, modo="inserir", limite_conjunto=LIMITE_CONJUNTO, telemetria=None):
+    relatorio = []
+    coluna_id = colunas["ID"]
+    ids = df[coluna_id].astype(str)
+
+    with medir(telemetria, "validacao_chaves", len(df)):
+        produtos = carregar_chaves(conexao, "Produtos", "ID_Prod", limite_conjunto)
+        produto_existe = produtos.contem(ids)
+
+        if "produtos" in tabelas:
+            if modo == "inserir":
+                relatorio.append(_conflitos(df, produto_existe, "produtos", "id_existente", coluna_id, coluna_id))
+            relatorio.append(_conflitos(df, ids.duplicated(keep=False).to_numpy(), "produtos", "id_duplicado_no_arquivo", coluna_id, coluna_id))
+            # Os produtos do próprio arquivo passam a existir antes da carga das tabelas filhas
+            produto_existe = np.ones(len(df), dtype=bool)
+
+        for tabela in ("precos", "codbarras"):
+            if tabela not in tabelas:
+                continue
+            relatorio.append(_conflitos(df, ~produto_existe, tabela, "produto_inexistente", coluna_id, coluna_id))
+            if modo == "inserir":
+                tabela_sql, coluna_sql, chave = CHAVES_DESTINO[tabela]
+                coluna_valor = colunas[chave]
+                existentes = carregar_chaves(conexao, tabela_sql, coluna_sql, limite_conjunto)
+                motivo = "preco_existente" if tabela == "precos" else "codigo_barras_existente"
+                relatorio.append(_conflitos(df, existentes.contem(df[coluna_valor].astype(str)), tabela, motivo, coluna_id, coluna_valor))
+
+    return pd.concat(relatorio, ignore_index=True) if relatorio else pd.DataFrame(columns=["tabela", "motivo", "linha", "ID", "valor"])
+
+# Função para importar um CSV somente se a validação prévia não encontrar conflitos
+def importar_csv_validado(caminho, column_mappings_file=ARQUIVO_MAPEAMENTO, conexao=None, tabelas=("produtos", "precos", "codbarras"), substituir_id=False, tamanho_lote=TAMANHO_LOTE, telemetria=None, modo="inserir"):
+    df, colunas = ler_csv_tratado(caminho, column_mappings_file, substituir_id, telemetria)
+    conflitos = validar_chaves(df, colunas, tabelas, conexao, modo, telemetria=telemetria)
+    if len(conflitos):
+        raise ConflitosChaves(conflitos)
+    return carregar_tabelas(df, colunas, tabelas, column_mappings_file, conexao, tamanho_lote, telemetria, modo)